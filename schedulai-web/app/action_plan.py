@@ -0,0 +1,97 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+from app.schemas import MAX_RANGE_DAYS
+
+# Actions that change the calendar; "check" only reads it
+WRITE_ACTIONS = {"create", "schedule", "delete", "delete_all", "update"}
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _day(value):
+    m = _DATE.match(str(value or ""))
+    return m.group(0) if m else None
+
+
+def _days_between(start, end):
+    try:
+        first = datetime.strptime(start, "%Y-%m-%d")
+        last = datetime.strptime(end, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= (last - first).days < MAX_RANGE_DAYS:
+        # FreeSlotRequest will reject it; don't plan around the bogus range
+        return None
+    return {
+        (first + timedelta(days=i)).strftime("%Y-%m-%d")
+        for i in range((last - first).days + 1)
+    }
+
+
+def action_days(action):
+    """
+    The calendar days an action reads or writes, or None when that can't be
+    told (which makes it depend on everything around it).
+    """
+    if not isinstance(action, dict):
+        return None
+    name = str(action.get("action", "schedule")).lower()
+    if name == "delete":
+        days = {_day(action.get("start_time"))}
+    elif name == "update":
+        original = action.get("original_event") or {}
+        updates = action.get("updated_fields") or {}
+        days = {_day(original.get("start_time"))}
+        days |= {_day(updates.get(f)) for f in ("start_time", "end_time")} - {None}
+    elif action.get("start_date") or action.get("end_date"):
+        return _days_between(action.get("start_date"), action.get("end_date"))
+    else:
+        days = {_day(action.get("date"))}
+    return None if None in days else days
+
+
+def is_write(action):
+    if not isinstance(action, dict):
+        return True
+    return str(action.get("action", "schedule")).lower() in WRITE_ACTIONS
+
+
+def dependencies(actions):
+    """
+    For each action, the earlier actions it has to wait for: those touching
+    one of its days where at least one of the two writes. Reads of
+    different days, or of the same day, never wait on each other.
+    """
+    days = [action_days(action) for action in actions]
+    writes = [is_write(action) for action in actions]
+    plan = []
+    for i in range(len(actions)):
+        plan.append(
+            [
+                j
+                for j in range(i)
+                if (writes[i] or writes[j])
+                and (days[i] is None or days[j] is None or days[i] & days[j])
+            ]
+        )
+    return plan
+
+
+async def execute_plan(actions, run):
+    """
+    Await `run(action)` for every action, each as soon as the actions it
+    depends on have finished. Results (or exceptions) come back in order.
+    """
+    tasks = []
+
+    async def step(i, after):
+        if after:
+            # A failed dependency doesn't cancel the step; it just ran first
+            await asyncio.gather(*(tasks[j] for j in after), return_exceptions=True)
+        return await run(actions[i])
+
+    for i, after in enumerate(dependencies(actions)):
+        tasks.append(asyncio.ensure_future(step(i, after)))
+    return await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,23 +1,22 @@
-from pymongo import MongoClient
 from fastapi import APIRouter, Request, HTTPException
 from fastapi.responses import RedirectResponse
 from google_auth_oauthlib.flow import Flow
 from app.config import SCOPES, REDIRECT_URI
+from app.calendar_pool import calendar_pool
+from app.calendar_watch import channel_registry
+from app.credential_store import credential_store
+from app.log import fields
+from app.tracing import traced_threadpool
+import logging
 import os
 from dotenv import load_dotenv
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
-# In-memory token store (optional)
-user_tokens = {}
-
 load_dotenv()
-# MongoDB setup
-client = MongoClient(os.getenv("MONGODB_URI"))
-db = client["schedulai_db"]
-users_collection = db["users"]
 
 
 @router.get("/auth/login")
@@ -30,11 +29,13 @@ def login():
 
 
 @router.get("/auth/callback")
-def auth_callback(request: Request):
+async def auth_callback(request: Request):
     flow = Flow.from_client_secrets_file(
         "credentials.json", scopes=SCOPES, redirect_uri=REDIRECT_URI
     )
-    flow.fetch_token(authorization_response=str(request.url))
+    await traced_threadpool(
+        "oauth.fetch_token", flow.fetch_token, authorization_response=str(request.url)
+    )
     credentials = flow.credentials
 
     user_id = "demo_user"
@@ -48,13 +49,21 @@ def auth_callback(request: Request):
         "scopes": credentials.scopes,
     }
 
-    users_collection.update_one(
-        {"user_id": user_id},
-        {"$set": {"credentials": cred_dict}},
-        upsert=True,
-    )
+    # The pool is keyed by the old login's refresh token, not the new one
+    previous = await credential_store.get(user_id)
+
+    # Writes through to Mongo and the in-process cache
+    await credential_store.save(user_id, cred_dict)
+
+    # Fresh login: drop the warm session built with the old credentials
+    if previous:
+        calendar_pool.invalidate(previous)
 
-    user_tokens[user_id] = cred_dict
+    # Register (or renew) the push channel that keeps cached events fresh
+    try:
+        await channel_registry.ensure_channel(user_id, cred_dict)
+    except Exception as e:
+        logger.warning("Calendar watch registration failed", extra=fields(error=str(e)))
 
     response = RedirectResponse(url="/static/index.html")
     response.set_cookie(key="access_token", value=credentials.token, httponly=True)
@@ -1,25 +1,11 @@
-from googleapiclient.discovery import build
-from datetime import datetime
-from google.oauth2.credentials import Credentials
+from app.event_store import event_store
+from app.singleflight import coalesced
+from app.tracing import traced
 
 
-def get_upcoming_events(credentials_dict, max_results=10):
-    creds = Credentials(**credentials_dict)
-
-    service = build("calendar", "v3", credentials=creds)
-
-    now = datetime.utcnow().isoformat() + "Z"  # 'Z' = UTC time
-    events_result = (
-        service.events()
-        .list(
-            calendarId="primary",
-            timeMin=now,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
-    )
-
-    events = events_result.get("items", [])
+@traced()
+@coalesced("upcoming")
+async def get_upcoming_events(credentials_dict, max_results=10):
+    # Served from the synced per-user event store
+    events = await event_store.upcoming(credentials_dict, max_results)
     return events
@@ -0,0 +1,358 @@
+import asyncio
+import json as jsonlib
+import os
+import uuid
+from urllib.parse import urlparse
+
+import httpx
+
+from app.calendar_pool import calendar_pool
+from app.metrics import calendar_request_seconds, calendar_responses
+from app.tracing import tracer
+
+CALENDAR_API_BASE = os.getenv(
+    "GOOGLE_CALENDAR_API_BASE", "https://www.googleapis.com/calendar/v3"
+)
+CALENDAR_BATCH_URL = os.getenv(
+    "GOOGLE_CALENDAR_BATCH_URL", "https://www.googleapis.com/batch/calendar/v3"
+)
+# Google rejects Calendar batches with more than 50 inner requests
+CALENDAR_BATCH_LIMIT = int(os.getenv("CALENDAR_BATCH_LIMIT", "50"))
+# freeBusy.query accepts at most 50 calendars per request
+FREEBUSY_ITEM_LIMIT = int(os.getenv("FREEBUSY_ITEM_LIMIT", "50"))
+CALENDAR_HTTP_TIMEOUT = float(os.getenv("CALENDAR_HTTP_TIMEOUT", "15"))
+CALENDAR_HTTP_MAX_CONNECTIONS = int(os.getenv("CALENDAR_HTTP_MAX_CONNECTIONS", "200"))
+CALENDAR_HTTP_MAX_KEEPALIVE = int(os.getenv("CALENDAR_HTTP_MAX_KEEPALIVE", "50"))
+
+_http_client = None
+
+
+def get_http_client():
+    """Process-wide httpx client shared by every Calendar call (keeps connections warm)."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=CALENDAR_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=CALENDAR_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=CALENDAR_HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+class CalendarAPIError(Exception):
+    def __init__(self, status_code, message, payload=None):
+        super().__init__(f"Calendar API error {status_code}: {message}")
+        self.status_code = status_code
+        self.payload = payload
+
+
+class CalendarClient:
+    """Async Google Calendar v3 client for one user's session."""
+
+    def __init__(self, session, http=None):
+        self.session = session
+        self.http = http or get_http_client()
+
+    async def _request(
+        self, method, path, params=None, json=None, headers=None, operation="other"
+    ):
+        url = f"{CALENDAR_API_BASE}{path}"
+        token = self.session.access_token
+        res = await self._send(
+            method, url, token, params, json, headers, operation=operation
+        )
+
+        # Expired access token: refresh once and replay
+        if res.status_code == 401 and self.session.credentials.get("refresh_token"):
+            token = await self.session.refresh(self.http, token)
+            res = await self._send(
+                method, url, token, params, json, headers, operation=operation
+            )
+
+        if res.status_code >= 400:
+            try:
+                payload = res.json()
+                message = payload.get("error", {}).get("message", res.text)
+            except ValueError:
+                payload, message = None, res.text
+            raise CalendarAPIError(res.status_code, message, payload)
+
+        if res.status_code == 204 or not res.content:
+            return {}
+        return res.json()
+
+    async def _send(
+        self,
+        method,
+        url,
+        token,
+        params=None,
+        json=None,
+        headers=None,
+        content=None,
+        operation="other",
+    ):
+        timer = calendar_request_seconds.time(operation=operation)
+        with tracer.span(f"calendar.{operation}") as span, timer:
+            try:
+                res = await self.http.request(
+                    method,
+                    url,
+                    params=params,
+                    json=json,
+                    content=content,
+                    headers={"Authorization": f"Bearer {token}", **(headers or {})},
+                )
+            except httpx.HTTPError as e:
+                calendar_responses.inc(operation=operation, status=type(e).__name__)
+                raise
+            span.set("http.status", res.status_code)
+        calendar_responses.inc(operation=operation, status=res.status_code)
+        return res
+
+    async def freebusy_query(self, body):
+        return await self._request("POST", "/freeBusy", json=body, operation="freebusy")
+
+    async def freebusy(self, time_min, time_max, calendar_ids, time_zone):
+        """freeBusy for any number of calendars, chunked to the per-request item limit."""
+        ids = list(dict.fromkeys(calendar_ids))
+        chunks = [
+            ids[i : i + FREEBUSY_ITEM_LIMIT]
+            for i in range(0, len(ids), FREEBUSY_ITEM_LIMIT)
+        ]
+        results = await asyncio.gather(
+            *(
+                self.freebusy_query(
+                    {
+                        "timeMin": time_min,
+                        "timeMax": time_max,
+                        "timeZone": time_zone,
+                        "items": [{"id": calendar_id} for calendar_id in chunk],
+                    }
+                )
+                for chunk in chunks
+            )
+        )
+        calendars = {}
+        for result in results:
+            calendars.update(result.get("calendars", {}))
+        return calendars
+
+    async def list_events(self, calendar_id="primary", **params):
+        # httpx sends booleans as "true"/"false", which is what Google expects
+        return await self._request(
+            "GET",
+            f"/calendars/{calendar_id}/events",
+            params=params,
+            operation="events.list",
+        )
+
+    async def insert_event(self, body, calendar_id="primary"):
+        return await self._request(
+            "POST",
+            f"/calendars/{calendar_id}/events",
+            json=body,
+            operation="events.insert",
+        )
+
+    async def update_event(self, event_id, body, calendar_id="primary"):
+        return await self._request(
+            "PUT",
+            f"/calendars/{calendar_id}/events/{event_id}",
+            json=body,
+            operation="events.update",
+        )
+
+    async def get_event(self, event_id, calendar_id="primary"):
+        return await self._request(
+            "GET",
+            f"/calendars/{calendar_id}/events/{event_id}",
+            operation="events.get",
+        )
+
+    async def patch_event(
+        self, event_id, body, calendar_id="primary", etag=None, fields=None
+    ):
+        """
+        Change only the fields in `body`. With `etag`, Google answers 412
+        instead of overwriting an event that changed since it was read;
+        `fields` trims the returned event to that partial-response mask.
+        """
+        return await self._request(
+            "PATCH",
+            f"/calendars/{calendar_id}/events/{event_id}",
+            params={"fields": fields} if fields else None,
+            json=body,
+            headers={"If-Match": etag} if etag else None,
+            operation="events.patch",
+        )
+
+    async def delete_event(self, event_id, calendar_id="primary"):
+        return await self._request(
+            "DELETE",
+            f"/calendars/{calendar_id}/events/{event_id}",
+            operation="events.delete",
+        )
+
+    async def watch_events(self, body, calendar_id="primary"):
+        return await self._request(
+            "POST",
+            f"/calendars/{calendar_id}/events/watch",
+            json=body,
+            operation="events.watch",
+        )
+
+    async def stop_channel(self, channel_id, resource_id):
+        return await self._request(
+            "POST",
+            "/channels/stop",
+            json={"id": channel_id, "resourceId": resource_id},
+            operation="channels.stop",
+        )
+
+    async def batch(self, requests):
+        """
+        Send many calls through the Calendar batch endpoint.
+
+        `requests` is a list of {"method", "path", "body"} dicts where `path`
+        is relative to the API base (e.g. "/calendars/primary/events/abc").
+        Returns one {"status", "body"} dict per request, in input order, so
+        callers can report partial failures.
+        """
+        chunks = [
+            requests[i : i + CALENDAR_BATCH_LIMIT]
+            for i in range(0, len(requests), CALENDAR_BATCH_LIMIT)
+        ]
+        results = await asyncio.gather(*(self._send_batch(c) for c in chunks))
+        return [item for chunk in results for item in chunk]
+
+    async def batch_delete(self, event_ids, calendar_id="primary"):
+        return await self.batch(
+            [
+                {
+                    "method": "DELETE",
+                    "path": f"/calendars/{calendar_id}/events/{event_id}",
+                }
+                for event_id in event_ids
+            ]
+        )
+
+    async def _send_batch(self, requests):
+        boundary = f"batch_{uuid.uuid4().hex}"
+        body = _encode_batch(requests, boundary)
+        headers = {"Content-Type": f"multipart/mixed; boundary={boundary}"}
+
+        token = self.session.access_token
+        res = await self._send(
+            "POST",
+            CALENDAR_BATCH_URL,
+            token,
+            headers=headers,
+            content=body,
+            operation="batch",
+        )
+        if res.status_code == 401 and self.session.credentials.get("refresh_token"):
+            token = await self.session.refresh(self.http, token)
+            res = await self._send(
+                "POST",
+                CALENDAR_BATCH_URL,
+                token,
+                headers=headers,
+                content=body,
+                operation="batch",
+            )
+
+        if res.status_code >= 400:
+            # The whole batch was rejected: report it against every item, so
+            # callers still get one result per request (and other chunks count)
+            try:
+                error = res.json()
+            except ValueError:
+                error = None
+            if not isinstance(error, dict):
+                error = {"error": {"message": res.text}}
+            return [{"status": res.status_code, "body": error} for _ in requests]
+
+        parts = _decode_batch(res.headers.get("content-type", ""), res.content)
+        # Parts may come back in any order; Content-ID tells us which is which
+        return [
+            parts.get(
+                i,
+                {
+                    "status": 500,
+                    "body": {"error": {"message": "Missing batch response"}},
+                },
+            )
+            for i in range(len(requests))
+        ]
+
+
+def _encode_batch(requests, boundary):
+    api_path = urlparse(CALENDAR_API_BASE).path
+    lines = []
+    for i, req in enumerate(requests):
+        lines += [
+            f"--{boundary}",
+            "Content-Type: application/http",
+            f"Content-ID: <item{i}>",
+            "",
+            f"{req['method']} {api_path}{req['path']} HTTP/1.1",
+        ]
+        if req.get("body") is not None:
+            payload = jsonlib.dumps(req["body"])
+            lines += ["Content-Type: application/json", "", payload]
+        else:
+            lines += [""]
+        lines += [""]
+    lines.append(f"--{boundary}--")
+    return "\r\n".join(lines).encode()
+
+
+def _decode_batch(content_type, content):
+    boundary = None
+    for param in content_type.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise CalendarAPIError(502, "Batch response without multipart boundary")
+
+    results = {}
+    text = content.decode("utf-8", errors="replace").replace("\r\n", "\n")
+    for part in text.split(f"--{boundary}")[1:]:
+        if part.startswith("--"):
+            break
+        outer_headers, _, inner = part.strip("\n").partition("\n\n")
+
+        index = None
+        for line in outer_headers.split("\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                # "<response-item3>" -> 3
+                index = int(value.strip().strip("<>").rsplit("item", 1)[-1])
+        if index is None:
+            continue
+
+        status_and_headers, _, inner_body = inner.partition("\n\n")
+        status = int(status_and_headers.split("\n", 1)[0].split()[1])
+        inner_body = inner_body.strip()
+        try:
+            parsed = jsonlib.loads(inner_body) if inner_body else None
+        except ValueError:
+            parsed = {"raw": inner_body}
+        results[index] = {"status": status, "body": parsed}
+    return results
+
+
+def calendar_client(credentials_dict, user_id=None):
+    """Calendar client bound to the user's pooled session and the shared HTTP client."""
+    return CalendarClient(calendar_pool.get(credentials_dict, user_id))
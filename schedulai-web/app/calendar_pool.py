@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from app.log import fields
+from app.metrics import calendar_request_seconds, calendar_responses
+
+logger = logging.getLogger(__name__)
+
+# How long an unused user entry stays warm before it is evicted
+POOL_IDLE_SECONDS = int(os.getenv("CALENDAR_POOL_IDLE_SECONDS", "600"))
+
+
+def credentials_key(credentials_dict, user_id=None):
+    """Stable per-user pool key: the user id if known, else the OAuth grant."""
+    if user_id:
+        return user_id
+    raw = "|".join(
+        [
+            credentials_dict.get("client_id") or "",
+            credentials_dict.get("refresh_token") or credentials_dict.get("token") or "",
+        ]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def credentials_fingerprint(credentials_dict):
+    """Changes whenever any part of the stored credentials changes."""
+    raw = "|".join(
+        [
+            credentials_dict.get("token") or "",
+            credentials_dict.get("refresh_token") or "",
+            credentials_dict.get("client_id") or "",
+            credentials_dict.get("client_secret") or "",
+            " ".join(sorted(credentials_dict.get("scopes") or [])),
+        ]
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class CalendarSession:
+    """
+    Per-user Calendar auth state: the stored OAuth credentials plus the
+    current access token, which is refreshed in place when Google rejects it.
+    """
+
+    def __init__(self, key, fingerprint, credentials_dict, token_store=None):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.credentials = dict(credentials_dict)
+        self.token_store = token_store
+        self.access_token = credentials_dict.get("token")
+        self.last_used = time.monotonic()
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh(self, http, stale_token):
+        async with self._refresh_lock:
+            # Another request already refreshed while we waited
+            if self.access_token != stale_token:
+                return self.access_token
+
+            with calendar_request_seconds.time(operation="oauth.refresh"):
+                res = await http.post(
+                    self.credentials["token_uri"],
+                    data={
+                        "grant_type": "refresh_token",
+                        "refresh_token": self.credentials["refresh_token"],
+                        "client_id": self.credentials["client_id"],
+                        "client_secret": self.credentials["client_secret"],
+                    },
+                )
+            calendar_responses.inc(operation="oauth.refresh", status=res.status_code)
+            res.raise_for_status()
+            self.access_token = res.json()["access_token"]
+            await self._save_token()
+            return self.access_token
+
+    async def _save_token(self):
+        if self.token_store is None:
+            return
+        try:
+            # Otherwise every restart or rebuilt session refreshes all over again
+            await self.token_store.save_token(self.credentials, self.access_token)
+        except Exception as e:
+            logger.warning(
+                "Failed to store refreshed access token", extra=fields(error=str(e))
+            )
+            return
+        # The stored credentials now carry the new token; keep matching them
+        self.credentials["token"] = self.access_token
+        self.fingerprint = credentials_fingerprint(self.credentials)
+
+
+class CalendarSessionPool:
+    """
+    Keeps warm Calendar sessions per user.
+
+    The HTTP connections themselves live in the shared httpx client (see
+    app/calendar_client.py); this pool only keeps each user's token state so
+    a refreshed access token is reused instead of re-refreshing per call.
+    Idle users are evicted and an entry is rebuilt when its credentials change.
+    """
+
+    def __init__(self, idle_seconds=POOL_IDLE_SECONDS):
+        self.idle_seconds = idle_seconds
+        # Set by app.credential_store: anything with save_token(credentials, token)
+        self.token_store = None
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._creates = 0
+        self._reuses = 0
+        self._evictions = 0
+
+    def get(self, credentials_dict, user_id=None):
+        key = credentials_key(credentials_dict, user_id)
+        fingerprint = credentials_fingerprint(credentials_dict)
+        with self._lock:
+            self._evict_idle_locked()
+            session = self._entries.get(key)
+            if session is None or session.fingerprint != fingerprint:
+                # New user or credentials changed (re-login / new token): start fresh
+                session = CalendarSession(
+                    key, fingerprint, credentials_dict, self.token_store
+                )
+                self._entries[key] = session
+                self._creates += 1
+            else:
+                self._reuses += 1
+            session.last_used = time.monotonic()
+            return session
+
+    def _evict_idle_locked(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        stale = [key for key, s in self._entries.items() if s.last_used < cutoff]
+        for key in stale:
+            del self._entries[key]
+        self._evictions += len(stale)
+
+    def invalidate(self, credentials_dict=None, user_id=None):
+        """Drop a user's session, e.g. after they log in again."""
+        key = credentials_key(credentials_dict or {}, user_id)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle_locked()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._entries),
+                "creates": self._creates,
+                "reuses": self._reuses,
+                "evictions": self._evictions,
+            }
+
+
+calendar_pool = CalendarSessionPool()
@@ -1,15 +1,25 @@
 from datetime import datetime, timedelta
+import logging
 import pytz
-from google.oauth2.credentials import Credentials
 from dateutil import parser
 from datetime import timedelta
 from typing import Optional
 from dateutil import tz
-from googleapiclient.discovery import build
 from difflib import get_close_matches
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
+
+from app.calendar_client import CalendarAPIError, calendar_client
+from app.config import SLOT_STEP_MINUTES, UPDATE_CONFLICT_RETRIES
+from app.event_store import event_store
+from app.log import fields
+from app.singleflight import coalesced
+from app.slots import iter_free_slots, merge_intervals, split_by_blockers
+from app.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# What a PATCH needs back: the fields it can change plus the server-side
+# bookkeeping; everything else is unchanged from the cached copy
+PATCH_RESPONSE_FIELDS = "id,etag,status,updated,sequence,summary,start,end,attendees"
 
 
 def ensure_aware(iso_str, local_tz):
@@ -19,20 +29,158 @@ def ensure_aware(iso_str, local_tz):
     return dt.astimezone(local_tz)
 
 
-def find_free_slot(credentials_dict, date, start_range, end_range, duration_minutes):
-    free_slots = get_all_free_slots(
-        credentials_dict, date, start_range, end_range, duration_minutes
+@traced()
+async def find_free_slot(
+    credentials_dict,
+    date,
+    start_range,
+    end_range,
+    duration_minutes,
+    step_minutes=None,
+    participants=None,
+):
+    start_dt, end_dt, busy_by_calendar, _ = await _busy_window(
+        credentials_dict, date, start_range, end_range, participants
+    )
+    # Free for everyone = outside the union of all visible calendars' busy time.
+    # Stop at the first hit instead of building the whole list.
+    first = next(
+        iter_free_slots(
+            _union(busy_by_calendar),
+            start_dt,
+            end_dt,
+            timedelta(minutes=duration_minutes),
+            timedelta(minutes=step_minutes or SLOT_STEP_MINUTES),
+        ),
+        None,
     )
-    return free_slots[0] if free_slots else None
+    if not first:
+        return None
+    return {"start": first[0].isoformat(), "end": first[1].isoformat()}
+
+
+@traced()
+async def get_all_free_slots(
+    credentials_dict,
+    date,
+    start_range,
+    end_range,
+    duration_minutes,
+    step_minutes=None,
+    participants=None,
+):
+    start_dt, end_dt, busy_by_calendar, _ = await _busy_window(
+        credentials_dict, date, start_range, end_range, participants
+    )
+
+    return [
+        {"start": slot_start.isoformat(), "end": slot_end.isoformat()}
+        for slot_start, slot_end in iter_free_slots(
+            _union(busy_by_calendar),
+            start_dt,
+            end_dt,
+            timedelta(minutes=duration_minutes),
+            timedelta(minutes=step_minutes or SLOT_STEP_MINUTES),
+        )
+    ]
 
 
-def get_all_free_slots(
-    credentials_dict, date, start_range, end_range, duration_minutes
+@traced()
+async def get_availability(
+    credentials_dict,
+    date,
+    start_range,
+    end_range,
+    duration_minutes,
+    step_minutes=None,
+    participants=None,
 ):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
+    """
+    Free slots for the user and all participants, plus the slots the user has
+    free but that some participants block (with who blocks them).
+    """
+    start_dt, end_dt, busy_by_calendar, unavailable = await _busy_window(
+        credentials_dict, date, start_range, end_range, participants
+    )
+    own_busy = busy_by_calendar.pop("primary", [])
+
+    candidates = iter_free_slots(
+        own_busy,
+        start_dt,
+        end_dt,
+        timedelta(minutes=duration_minutes),
+        timedelta(minutes=step_minutes or SLOT_STEP_MINUTES),
+    )
+    free, blocked = split_by_blockers(candidates, busy_by_calendar)
+
+    return {
+        "free_slots": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in free],
+        "blocked_slots": [
+            {"start": s.isoformat(), "end": e.isoformat(), "blocked_by": blockers}
+            for s, e, blockers in blocked
+        ],
+        # Calendars Google wouldn't show us (not shared / unknown address)
+        "unavailable_participants": unavailable,
+    }
+
 
+@traced()
+async def get_free_slots_for_range(
+    credentials_dict,
+    start_date,
+    end_date,
+    start_range,
+    end_range,
+    duration_minutes,
+    step_minutes=None,
+    participants=None,
+):
+    """Free slots for every day in [start_date, end_date] from one freebusy query."""
     tz = pytz.timezone("Asia/Dubai")
+    first_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+    last_day = datetime.strptime(end_date, "%Y-%m-%d").date()
+    days = [
+        (first_day + timedelta(days=i)).strftime("%Y-%m-%d")
+        for i in range((last_day - first_day).days + 1)
+    ]
+
+    windows = [_day_window(day, start_range, end_range, tz) for day in days]
+    # A today-window can start after it ends (late in the day); don't invert the query
+    time_min = min(windows[0])
+    busy_by_calendar, _ = await _query_busy(
+        credentials_dict, time_min, windows[-1][1], tz, participants
+    )
+    busy_times = _union(busy_by_calendar)
+
+    slots_by_day = {}
+    for day, (day_start, day_end) in zip(days, windows):
+        day_busy = [(s, e) for s, e in busy_times if e > day_start and s < day_end]
+        slots_by_day[day] = [
+            {"start": slot_start.isoformat(), "end": slot_end.isoformat()}
+            for slot_start, slot_end in iter_free_slots(
+                day_busy,
+                day_start,
+                day_end,
+                timedelta(minutes=duration_minutes),
+                timedelta(minutes=step_minutes or SLOT_STEP_MINUTES),
+            )
+        ]
+    return slots_by_day
+
+
+async def _busy_window(
+    credentials_dict, date, start_range, end_range, participants=None
+):
+    """Resolve the search window for a day and fetch its busy intervals."""
+    tz = pytz.timezone("Asia/Dubai")
+    start_dt, end_dt = _day_window(date, start_range, end_range, tz)
+    busy_by_calendar, unavailable = await _query_busy(
+        credentials_dict, start_dt, end_dt, tz, participants
+    )
+    return start_dt, end_dt, busy_by_calendar, unavailable
+
+
+def _day_window(date, start_range, end_range, tz):
     date_obj = datetime.strptime(date, "%Y-%m-%d")
     today = datetime.now(tz).date()
 
@@ -62,48 +210,43 @@ def get_all_free_slots(
         if now > start_dt:
             start_dt = now
 
-    # Prepare free/busy query
-    body = {
-        "timeMin": start_dt.isoformat(),
-        "timeMax": end_dt.isoformat(),
-        "timeZone": "Asia/Dubai",
-        "items": [{"id": "primary"}],
-    }
-
-    events_result = service.freebusy().query(body=body).execute()
-    busy = events_result["calendars"]["primary"].get("busy", [])
-
-    busy_times = [
-        {"start": ensure_aware(b["start"], tz), "end": ensure_aware(b["end"], tz)}
-        for b in busy
-    ]
-
-    free_slots = []
-    current = start_dt
-
-    while current + timedelta(minutes=duration_minutes) <= end_dt:
-        slot_start = current
-        slot_end = current + timedelta(minutes=duration_minutes)
-
-        # Check overlap with busy periods
-        overlaps = any(
-            slot_start < b["end"] and slot_end > b["start"] for b in busy_times
-        )
-
-        if not overlaps:
-            free_slots.append(
-                {"start": slot_start.isoformat(), "end": slot_end.isoformat()}
-            )
-
-        current += timedelta(minutes=duration_minutes)
-
-    return free_slots
+    return start_dt, end_dt
+
+
+@traced()
+@coalesced("freebusy")
+async def _query_busy(credentials_dict, time_min, time_max, tz, participants=None):
+    """
+    Busy intervals per calendar for the user ("primary") and each participant,
+    plus the participants whose calendars the user can't see.
+    """
+    calendars = await calendar_client(credentials_dict).freebusy(
+        time_min.isoformat(),
+        time_max.isoformat(),
+        ["primary", *(participants or [])],
+        "Asia/Dubai",
+    )
 
+    busy_by_calendar, unavailable = {}, []
+    for calendar_id, calendar in calendars.items():
+        if calendar.get("errors"):
+            unavailable.append(calendar_id)
+            continue
+        busy_by_calendar[calendar_id] = [
+            (ensure_aware(b["start"], tz), ensure_aware(b["end"], tz))
+            for b in calendar.get("busy", [])
+        ]
+    return busy_by_calendar, unavailable
+
+
+def _union(busy_by_calendar):
+    return merge_intervals(
+        interval for busy in busy_by_calendar.values() for interval in busy
+    )
 
-def create_calendar_event(credentials_dict, title, start, end, attendees):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
 
+@traced()
+async def create_calendar_event(credentials_dict, title, start, end, attendees):
     event = {
         "summary": title,
         "start": {"dateTime": start, "timeZone": ""},
@@ -112,36 +255,26 @@ def create_calendar_event(credentials_dict, title, start, end, attendees):
         "reminders": {"useDefault": True},
     }
 
-    created_event = service.events().insert(calendarId="primary", body=event).execute()
+    created_event = await calendar_client(credentials_dict).insert_event(event)
+    event_store.apply_write(credentials_dict, created_event)
     return created_event
 
 
-def get_events_for_day(credentials_dict, date):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-
+@traced()
+@coalesced("events_for_day")
+async def get_events_for_day(credentials_dict, date):
     tz = pytz.timezone("Asia/Dubai")
     date_obj = datetime.strptime(date, "%Y-%m-%d")
     start_of_day = tz.localize(
         datetime(date_obj.year, date_obj.month, date_obj.day, 0, 0)
-    ).isoformat()
+    )
     end_of_day = tz.localize(
         datetime(date_obj.year, date_obj.month, date_obj.day, 23, 59)
-    ).isoformat()
-
-    events_result = (
-        service.events()
-        .list(
-            calendarId="primary",
-            timeMin=start_of_day,
-            timeMax=end_of_day,
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
     )
 
-    events = events_result.get("items", [])
+    events = await event_store.events_between(
+        credentials_dict, start_of_day, end_of_day
+    )
     return [
         {
             "id": e["id"],
@@ -153,10 +286,9 @@ def get_events_for_day(credentials_dict, date):
     ]
 
 
-def delete_event(credentials_dict, date, start_range, end_range, title=None):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-    local_tz = pytz.timezone("Asia/")
+@traced()
+async def delete_event(credentials_dict, date, start_range, end_range, title=None):
+    local_tz = pytz.timezone("Asia/Dubai")
 
     try:
         start_datetime_str = f"{date}T{start_range}:00"
@@ -169,25 +301,14 @@ def delete_event(credentials_dict, date, start_range, end_range, title=None):
             datetime.strptime(end_datetime_str, "%Y-%m-%dT%H:%M:%S")
         )
 
-        print("🔍 Deleting event titled:", title)
-        print("🔎 From:", start_dt)
-        print("🔎 To  :", end_dt)
-
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=start_dt.isoformat(),
-                timeMax=end_dt.isoformat(),
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
+        items = await event_store.events_between(credentials_dict, start_dt, end_dt)
+        logger.debug(
+            "Looking for event to delete",
+            extra=fields(
+                title=title, start=start_dt, end=end_dt, candidates=len(items)
+            ),
         )
 
-        items = events_result.get("items", [])
-        print(f"📅 Found {len(items)} events in time range.")
-
         for event in items:
             event_title = event.get("summary", "")
             event_start = event.get("start", {}).get("dateTime", "")
@@ -201,43 +322,44 @@ def delete_event(credentials_dict, date, start_range, end_range, title=None):
             if (
                 title and title.strip().lower() in event_title.strip().lower()
             ) or delta <= 300:
-                service.events().delete(
-                    calendarId="primary", eventId=event["id"]
-                ).execute()
-                print("🗑️ Deleted event:", event_title)
+                await calendar_client(credentials_dict).delete_event(event["id"])
+                event_store.apply_delete(credentials_dict, event["id"])
+                logger.info(
+                    "Deleted event",
+                    extra=fields(event_id=event["id"], title=event_title),
+                )
                 return f"✅ Deleted event: {event_title} on {date} at {start_range}"
 
         return "❌ No matching event found with that title or time."
 
-    except Exception as e:
-        print("❌ Error in delete_event:", e)
+    except Exception:
+        logger.exception("delete_event failed")
         raise
 
 
-def delete_event_by_id(credentials_dict, event_id):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-
+@traced()
+async def delete_event_by_id(credentials_dict, event_id):
     try:
-        service.events().delete(calendarId="primary", eventId=event_id).execute()
-        print("🗑️ Deleted event with ID:", event_id)
+        await calendar_client(credentials_dict).delete_event(event_id)
+        event_store.apply_delete(credentials_dict, event_id)
+        logger.info("Deleted event", extra=fields(event_id=event_id))
         return True
-    except Exception as e:
-        print("❌ Error deleting event:", e)
+    except Exception:
+        logger.exception("delete_event_by_id failed", extra=fields(event_id=event_id))
         raise
 
 
-def find_event_by_title_and_start_time(
+@traced()
+async def find_event_by_title_and_start_time(
     credentials_dict, title: str = None, start_time_iso: str = None
 ):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-
     try:
         local_tz = pytz.timezone("Asia/Dubai")
 
         if start_time_iso:
             start_dt = parser.isoparse(start_time_iso)
+            if start_dt.tzinfo is None:
+                start_dt = local_tz.localize(start_dt)
             end_dt = start_dt + timedelta(hours=3)
         else:
             # If no time provided, use whole day
@@ -246,22 +368,15 @@ def find_event_by_title_and_start_time(
             )
             end_dt = start_dt + timedelta(days=1)
 
-        print("🔍 Searching for event...")
-        print("🔎 Time Range:", start_dt.isoformat(), "to", end_dt.isoformat())
-
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=start_dt.isoformat(),
-                timeMax=end_dt.isoformat(),
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
+        events = await event_store.events_between(credentials_dict, start_dt, end_dt)
+        logger.debug(
+            "Looking for event",
+            extra=fields(
+                title=title, start=start_dt, end=end_dt, candidates=len(events)
+            ),
         )
 
-        for event in events_result.get("items", []):
+        for event in events:
             event_title = event.get("summary", "")
             event_start = event.get("start", {}).get("dateTime", "")
             if not event_start:
@@ -271,67 +386,93 @@ def find_event_by_title_and_start_time(
 
             # Match by time if provided
             if start_time_iso:
-                target_dt = parser.isoparse(start_time_iso)
+                target_dt = start_dt
                 delta = abs((event_dt - target_dt).total_seconds())
                 if delta <= 300:  # within 5 minutes
                     if (
                         not title
                         or title.strip().lower() in event_title.strip().lower()
                     ):
-                        print("✅ Match by time ±5min:", event_title)
+                        logger.debug(
+                            "Matched event by time", extra=fields(title=event_title)
+                        )
                         return event
             # Match by title if only title provided
             elif title and title.strip().lower() in event_title.strip().lower():
-                print("✅ Match by title only:", event_title)
+                logger.debug("Matched event by title", extra=fields(title=event_title))
                 return event
 
-        print("❌ No matching event found.")
+        logger.debug("No matching event found")
         return None
 
-    except Exception as e:
-        print("❌ Error in find_event_by_title_and_start_time:", e)
+    except Exception:
+        logger.exception("find_event_by_title_and_start_time failed")
         raise
 
 
-def update_event_fields(credentials_dict, event, updates):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-    event_id = event["id"]
-
-    if "title" in updates:
-        event["summary"] = updates["title"]
-    if "start_time" in updates:
-        event["start"]["dateTime"] = updates["start_time"]
-    if "end_time" in updates:
-        event["end"]["dateTime"] = updates["end_time"]
+def _event_patch(event, updates):
+    """The fields of `updates` that actually differ from `event`, as a PATCH body."""
+    patch = {}
+    if "title" in updates and updates["title"] != event.get("summary"):
+        patch["summary"] = updates["title"]
+    for field in ("start", "end"):
+        value = updates.get(f"{field}_time")
+        if value and value != event.get(field, {}).get("dateTime"):
+            # Nested objects are merged on PATCH, so timeZone is kept
+            patch[field] = {"dateTime": value}
     if "participants" in updates:
-        event["attendees"] = [{"email": email} for email in updates["participants"]]
-
-    updated_event = (
-        service.events()
-        .update(calendarId="primary", eventId=event_id, body=event)
-        .execute()
-    )
+        attendees = [{"email": email} for email in updates["participants"]]
+        current = [{"email": a.get("email")} for a in event.get("attendees", [])]
+        if attendees != current:
+            patch["attendees"] = attendees
+    return patch
+
+
+@traced()
+async def update_event_fields(credentials_dict, event, updates):
+    """
+    PATCH only the changed fields, guarded by the event's ETag. If the event
+    changed upstream (412) it is re-fetched and the patch recomputed against
+    the fresh copy, up to UPDATE_CONFLICT_RETRIES times.
+    """
+    client = calendar_client(credentials_dict)
+    event_id = event["id"]
 
+    for attempt in range(UPDATE_CONFLICT_RETRIES + 1):
+        patch = _event_patch(event, updates)
+        if not patch:
+            return event
+        try:
+            changed = await client.patch_event(
+                event_id, patch, etag=event.get("etag"), fields=PATCH_RESPONSE_FIELDS
+            )
+            # If-Match held, so the cached copy was current apart from our patch.
+            # Google leaves empty fields out of the response, so a patched key
+            # it doesn't echo back was cleared, not left as it was
+            updated_event = {k: v for k, v in event.items() if k not in patch}
+            updated_event.update(changed)
+            break
+        except CalendarAPIError as e:
+            if e.status_code != 412 or attempt == UPDATE_CONFLICT_RETRIES:
+                raise
+            logger.info(
+                "Event changed upstream, retrying update",
+                extra=fields(event_id=event_id, attempt=attempt + 1),
+            )
+            try:
+                event = await client.get_event(event_id)
+            except CalendarAPIError as e:
+                if e.status_code in (404, 410):
+                    event_store.apply_delete(credentials_dict, event_id)
+                raise
+            event_store.apply_write(credentials_dict, event)
+
+    event_store.apply_write(credentials_dict, updated_event)
     return updated_event
 
 
-def load_credentials_for_user(user_id: str):
-    client = MongoClient(os.getenv("MONGODB_URI"))
-    load_dotenv()
-    db = client["schedulai_db"]
-    user = db["users"].find_one({"user_id": user_id})
-
-    if not user or "credentials" not in user:
-        raise Exception("No credentials found for user.")
-
-    return user["credentials"]
-
-
-def delete_all_events_on_date(credentials_dict, date_str):
-    creds = Credentials(**credentials_dict)
-    service = build("calendar", "v3", credentials=creds)
-
+@traced()
+async def delete_all_events_on_date(credentials_dict, date_str):
     local_tz = pytz.timezone("Asia/Dubai")
     date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
@@ -340,35 +481,45 @@ def delete_all_events_on_date(credentials_dict, date_str):
         datetime.combine(date + timedelta(days=1), datetime.min.time())
     )
 
-    print(f"🔍 Fetching events on {date_str} between {start_dt} and {end_dt}...")
-
-    events_result = (
-        service.events()
-        .list(
-            calendarId="primary",
-            timeMin=start_dt.isoformat(),
-            timeMax=end_dt.isoformat(),
-            singleEvents=True,
-            orderBy="startTime",
-        )
-        .execute()
-    )
-
-    events = events_result.get("items", [])
+    client = calendar_client(credentials_dict)
+    events = await event_store.events_between(credentials_dict, start_dt, end_dt)
     deleted_titles = []
+    failed_events = []
 
-    for event in events:
-        event_id = event["id"]
+    # One batch request per 50 events instead of one round trip per event
+    results = await client.batch_delete([event["id"] for event in events])
+
+    for event, result in zip(events, results):
         title = event.get("summary", "Untitled Event")
-        try:
-            service.events().delete(calendarId="primary", eventId=event_id).execute()
+        if result["status"] < 300 or result["status"] in (404, 410):
+            # Gone upstream either way, so drop it locally
+            event_store.apply_delete(credentials_dict, event["id"])
+        if result["status"] < 300:
             deleted_titles.append(title)
-            print(f"✅ Deleted: {title}")
-        except Exception as e:
-            print(f"❌ Failed to delete {title}: {e}")
+        else:
+            error = (result["body"] or {}).get("error", {}).get("message", "")
+            failed_events.append(
+                {
+                    "id": event["id"],
+                    "title": title,
+                    "status": result["status"],
+                    "error": error,
+                }
+            )
 
+    logger.info(
+        "Deleted events on day",
+        extra=fields(
+            date=date_str, deleted=len(deleted_titles), failed=len(failed_events)
+        ),
+    )
+    if failed_events:
+        logger.warning(
+            "Some events could not be deleted", extra=fields(failed=failed_events)
+        )
     return {
         "date": date_str,
         "deleted_events": deleted_titles,
         "total_deleted": len(deleted_titles),
+        "failed_events": failed_events,
     }
@@ -0,0 +1,171 @@
+import logging
+import os
+import secrets
+import time
+import uuid
+
+from app.calendar_client import calendar_client
+from app.calendar_pool import credentials_key
+from app.credential_store import credential_store
+from app.event_store import event_store
+from app.log import fields
+
+logger = logging.getLogger(__name__)
+
+# Public HTTPS URL of /calendar/notifications; push is disabled when unset
+CALENDAR_WEBHOOK_URL = os.getenv("CALENDAR_WEBHOOK_URL")
+CHANNEL_TTL_SECONDS = int(os.getenv("CALENDAR_CHANNEL_TTL_SECONDS", "604800"))
+# Replace a channel at login if it expires sooner than this
+CHANNEL_RENEW_BEFORE_SECONDS = int(
+    os.getenv("CALENDAR_CHANNEL_RENEW_BEFORE_SECONDS", "86400")
+)
+
+
+class WatchChannel:
+    def __init__(
+        self, channel_id, token, resource_id, expiration, user_id, credentials_dict
+    ):
+        self.id = channel_id
+        self.token = token
+        self.resource_id = resource_id
+        self.expiration = expiration  # epoch seconds
+        self.user_id = user_id
+        self.use_credentials(credentials_dict)
+
+    def use_credentials(self, credentials_dict):
+        # Every login brings a new refresh token, and with it a new store key
+        self.credentials = credentials_dict
+        self.user_key = credentials_key(credentials_dict)
+
+    def expires_within(self, seconds):
+        return self.expiration - time.time() < seconds
+
+
+class ChannelRegistry:
+    """Calendar watch channels we registered, by channel id and by user."""
+
+    def __init__(self):
+        self._channels = {}
+        self._by_user = {}
+        # Event store key (from the channel's credentials) -> channel id
+        self._by_key = {}
+        self.notifications = 0
+        self.invalidations = 0
+
+    async def ensure_channel(self, user_id, credentials_dict):
+        """Register a channel for the user, or renew one that is about to expire."""
+        if not CALENDAR_WEBHOOK_URL:
+            return None
+
+        # Keyed by user, not credentials: those change on every login
+        current = self._channels.get(self._by_user.get(user_id))
+        if current and not current.expires_within(CHANNEL_RENEW_BEFORE_SECONDS):
+            self._by_key.pop(current.user_key, None)
+            current.use_credentials(credentials_dict)
+            self._by_key[current.user_key] = current.id
+            return current
+
+        client = calendar_client(credentials_dict)
+        token = secrets.token_urlsafe(24)
+        res = await client.watch_events(
+            {
+                "id": str(uuid.uuid4()),
+                "type": "web_hook",
+                "address": CALENDAR_WEBHOOK_URL,
+                "token": token,
+                "params": {"ttl": str(CHANNEL_TTL_SECONDS)},
+            }
+        )
+        channel = WatchChannel(
+            res["id"],
+            token,
+            res["resourceId"],
+            int(res.get("expiration", 0)) / 1000 or time.time() + CHANNEL_TTL_SECONDS,
+            user_id,
+            credentials_dict,
+        )
+        self._channels[channel.id] = channel
+        self._by_user[user_id] = channel.id
+        if current:
+            self._by_key.pop(current.user_key, None)
+        self._by_key[channel.user_key] = channel.id
+        logger.info(
+            "Registered calendar watch channel", extra=fields(channel=channel.id)
+        )
+
+        # The new channel is live, so the old one can go
+        if current:
+            self._channels.pop(current.id, None)
+            try:
+                # Stopped with the current login's credentials, not the old ones
+                await client.stop_channel(current.id, current.resource_id)
+            except Exception as e:
+                logger.warning(
+                    "Failed to stop old channel",
+                    extra=fields(channel=current.id, error=str(e)),
+                )
+
+        return channel
+
+    async def ensure_stored_channel(self, user_id):
+        """
+        ensure_channel with the user's saved credentials. Channels only live
+        in memory, so after a restart this brings push back without a login.
+        """
+        if not CALENDAR_WEBHOOK_URL:
+            return None
+        credentials_dict = await credential_store.get(user_id)
+        if credentials_dict is None:
+            return None
+        return await self.ensure_channel(user_id, credentials_dict)
+
+    def handle_notification(self, channel_id, token, resource_id, state):
+        """
+        Apply one push callback. Returns "ok", "unknown" or "forbidden".
+
+        Google sends a "sync" message when the channel starts and "exists" /
+        "not_exists" when something on the calendar changed.
+        """
+        channel = self._channels.get(channel_id)
+        if not channel or channel.resource_id != resource_id:
+            return "unknown"
+        if not secrets.compare_digest(channel.token, token or ""):
+            return "forbidden"
+
+        self.notifications += 1
+        if channel.expires_within(0):
+            self._forget(channel)
+        if state != "sync":
+            # Only this user's cached events are affected
+            event_store.invalidate(key=channel.user_key)
+            self.invalidations += 1
+        return "ok"
+
+    def push_active(self, user_key):
+        """True while a live channel covers the event store with this key."""
+        channel = self._channels.get(self._by_key.get(user_key))
+        if channel is None:
+            return False
+        if channel.expires_within(0):
+            # Google sends nothing once a channel expires; notice it here
+            self._forget(channel)
+            return False
+        return True
+
+    def _forget(self, channel):
+        self._channels.pop(channel.id, None)
+        if self._by_user.get(channel.user_id) == channel.id:
+            del self._by_user[channel.user_id]
+        if self._by_key.get(channel.user_key) == channel.id:
+            del self._by_key[channel.user_key]
+
+    def stats(self):
+        return {
+            "channels": len(self._channels),
+            "notifications": self.notifications,
+            "invalidations": self.invalidations,
+        }
+
+
+channel_registry = ChannelRegistry()
+event_store.push_channels = channel_registry
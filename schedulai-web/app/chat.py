@@ -1,12 +1,10 @@
 from fastapi import APIRouter, Request, Body, HTTPException
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-import httpx, os, json, re
+import os, json, re
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends
-from fastapi.concurrency import run_in_threadpool
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from fastapi.responses import Response, StreamingResponse
 from dateutil import parser
 
 
@@ -15,64 +13,64 @@ from app.calendar_utils import delete_event  # make sure this exists
 from app.calendar_utils import (
     find_free_slot,
     get_all_free_slots,
+    get_free_slots_for_range,
+    get_availability,
     create_calendar_event,
     get_events_for_day,
     delete_event,
     update_event_fields,  # ✅ add this
     find_event_by_title_and_start_time,  # ✅ and this
-    load_credentials_for_user,
     delete_all_events_on_date,
 )
 from app import calendar_utils
+from app.calendar_watch import channel_registry
+from app.singleflight import calendar_reads
 from app.utils import replace_natural_dates
+from app.llm_cache import llm_cache, prompt_version
+from app.intent_parser import parse_intent, record_source, fast_path_stats
+from app.llm_client import llm_client
+from app.chat_log import chat_log
+from app.json_extract import (
+    ACTION_REQUIRED_FIELDS,
+    JSONObjectScanner,
+    extract_first_json,
+    load_action,
+    plan_actions,
+)
+from app.action_plan import execute_plan
+from app.metrics import (
+    CONTENT_TYPE,
+    action_seconds,
+    chat_errors,
+    chat_stage_seconds,
+    registry,
+)
 
-from app.auth import user_tokens
+from app.credential_store import credential_store
+from app.log import app_logging, fields, log_payload
+from app.tracing import InMemoryExporter, tracer
 from app.schemas import EventData, FreeSlotRequest
 from pydantic import ValidationError
-import traceback
+import logging
+import asyncio
+from contextlib import aclosing, contextmanager
 from datetime import time
 
 load_dotenv()
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 LLM_MODEL = os.getenv("LLM_MODEL")
 
 
-def extract_first_json(text):
-    stack = []
-    start = None
-    for i, char in enumerate(text):
-        if char == "{":
-            if start is None:
-                start = i
-            stack.append("{")
-        elif char == "}":
-            if stack:
-                stack.pop()
-                if not stack:
-                    return text[start : i + 1]
-    return None
-
-
 def normalize_time_format(time_str):
     if time_str and re.fullmatch(r"\d{1,2}", time_str):
         return f"{int(time_str):02d}:00"
     return time_str
 
 
-@router.post("/chat")
-async def chat_with_gpt(request: Request):
-    body = await request.json()
-    user_prompt = body.get("message")
-    credentials_dict = user_tokens.get("demo_user")
-
-    if not credentials_dict:
-        return {"error": "❌ No credentials found. Please log in first."}
-
-    user_prompt = replace_natural_dates(user_prompt)
-
-    system_prompt = f"""
+def build_system_prompt():
+    return f"""
     You are a smart calendar assistant named Schedulai. Always return only valid, compact JSON. 
 
     Never return placeholder values like "Meeting title (unknown)". If unsure, just omit the title field.
@@ -98,6 +96,18 @@ async def chat_with_gpt(request: Request):
     "date": "YYYY-MM-DD",
     "start_range": "HH:MM",       // optional
     "end_range": "HH:MM",         // optional
+    "duration": optional number of minutes,
+    "step": optional minutes between suggested start times (e.g. 15),
+    "participants": ["email1"]    // optional, people who must also be free
+    }}
+
+    ✅ When **checking availability over several days** ("this week", "Monday to Friday"), return:
+    {{
+    "action": "check",
+    "start_date": "YYYY-MM-DD",
+    "end_date": "YYYY-MM-DD",
+    "start_range": "HH:MM",       // optional, daily working-hours start
+    "end_range": "HH:MM",         // optional, daily working-hours end
     "duration": optional number of minutes
     }}
 
@@ -143,6 +153,18 @@ async def chat_with_gpt(request: Request):
 
     ---
 
+    ✅ When the user asks for **several things in one message** ("cancel my 3pm and book a sync at 5"), return every action in one object, in the order the user wants them done:
+    {{
+    "actions": [
+        {{"action": "delete", "start_time": "YYYY-MM-DDTHH:MM:SS"}},
+        {{"action": "create", "title": "Sync", "date": "YYYY-MM-DD", "start_range": "HH:MM", "end_range": "HH:MM"}},
+        {{"action": "check", "date": "YYYY-MM-DD"}}
+    ]
+    }}
+    Each item uses the same fields as above. A single request stays a single object without "actions".
+
+    ---
+
     Only return JSON — no markdown, no explanation, no apologies. Just raw valid JSON in the expected schema.
 
     ⚠️ TODAY'S DATE IS {datetime.now().strftime('%Y-%m-%d')}
@@ -150,14 +172,16 @@ async def chat_with_gpt(request: Request):
     🛑 Never return past dates.
     Only use today's date or a future date (>= today's date).
     """
-    few_shot_examples = [
-        {
-            "role": "user",
-            "content": "rename my 3pm meeting on July 20 to 'Client Review'",
-        },
-        {
-            "role": "assistant",
-            "content": """
+
+
+FEW_SHOT_EXAMPLES = [
+    {
+        "role": "user",
+        "content": "rename my 3pm meeting on July 20 to 'Client Review'",
+    },
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "update",
   "original_event": {
@@ -168,28 +192,28 @@ async def chat_with_gpt(request: Request):
   }
 }
 """,
-        },
-        {
-            "role": "user",
-            "content": "cancel the event titled 'Strategy Call' on July 15 at 7pm",
-        },
-        {
-            "role": "assistant",
-            "content": """
+    },
+    {
+        "role": "user",
+        "content": "cancel the event titled 'Strategy Call' on July 15 at 7pm",
+    },
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "delete",
   "title": "Strategy Call",
   "start_time": "2025-07-15T19:00:00+05:00"
 }
 """,
-        },
-        {
-            "role": "user",
-            "content": "move the 3pm call on July 16 to 6pm",
-        },
-        {
-            "role": "assistant",
-            "content": """
+    },
+    {
+        "role": "user",
+        "content": "move the 3pm call on July 16 to 6pm",
+    },
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "update",
   "original_event": {
@@ -201,27 +225,27 @@ async def chat_with_gpt(request: Request):
   }
 }
 """,
-        },
-        {
-            "role": "user",
-            "content": "delete all meetings on July 19",
-        },
-        {
-            "role": "assistant",
-            "content": """
+    },
+    {
+        "role": "user",
+        "content": "delete all meetings on July 19",
+    },
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "delete_all",
   "date": "2025-07-19"
 }
 """,
-        },
-        {
-            "role": "user",
-            "content": "Move the 3pm meeting on July 17 to Saturday at 5pm",
-        }, 
-        {
-            "role": "assistant",
-            "content": """
+    },
+    {
+        "role": "user",
+        "content": "Move the 3pm meeting on July 17 to Saturday at 5pm",
+    }, 
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "update",
   "original_event": {
@@ -233,14 +257,14 @@ async def chat_with_gpt(request: Request):
   }
 }
 """,
-        },
-        {
-            "role": "user",
-            "content": "Reschedule the 3pm PDFCall tomorrow to July 22 at 6pm",
-        },
-        {
-            "role": "assistant",
-            "content": """
+    },
+    {
+        "role": "user",
+        "content": "Reschedule the 3pm PDFCall tomorrow to July 22 at 6pm",
+    },
+    {
+        "role": "assistant",
+        "content": """
 {
   "action": "update",
   "original_event": {
@@ -253,12 +277,52 @@ async def chat_with_gpt(request: Request):
   }
 }
 """,
-        },
-    ]
+    },
+    {
+        "role": "user",
+        "content": "cancel my 3pm on July 18 and book a sync with sarah@example.com at 5 that day, then show free slots on July 19",
+    },
+    {
+        "role": "assistant",
+        "content": """
+{
+  "actions": [
+    {
+      "action": "delete",
+      "start_time": "2025-07-18T15:00:00+05:00"
+    },
+    {
+      "action": "create",
+      "title": "Sync",
+      "date": "2025-07-18",
+      "start_range": "17:00",
+      "end_range": "18:00",
+      "participants": ["sarah@example.com"]
+    },
+    {
+      "action": "check",
+      "date": "2025-07-19"
+    }
+  ]
+}
+""",
+    },
+]
+
+
+def prepare_llm_request(user_prompt):
+    """Cache key and OpenRouter payload for a date-normalized user message."""
+    system_prompt = build_system_prompt()
+    cache_key = llm_cache.key(
+        user_prompt,
+        LLM_MODEL,
+        datetime.now().strftime("%Y-%m-%d"),
+        prompt_version(system_prompt, FEW_SHOT_EXAMPLES),
+    )
 
     messages = [
         {"role": "system", "content": system_prompt},
-        *few_shot_examples,
+        *FEW_SHOT_EXAMPLES,
         {"role": "user", "content": user_prompt},
     ]
 
@@ -266,56 +330,203 @@ async def chat_with_gpt(request: Request):
         "model": LLM_MODEL,
         "messages": messages,  # ✅ Now using system + few-shot + user input
     }
+    return cache_key, payload
 
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
 
+def lookup_action(user_prompt, cache_key):
+    """Action from the fast-path parser or the LLM cache, or None if the LLM is needed."""
+    # ⚡ Regular commands are parsed locally; the LLM only sees the rest
+    parsed_data = parse_intent(user_prompt)
+    if parsed_data is not None:
+        source = "fast_path"
+    else:
+        parsed_data = llm_cache.get(cache_key)
+        source = "cache" if parsed_data is not None else "llm"
+    record_source(source)
+    return parsed_data
+
+
+def parse_llm_message(raw_message):
+    """Returns (parsed_data, None) or (None, error response)."""
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                json=payload,
-                headers=headers,
+        return json.loads(raw_message), None
+    except json.JSONDecodeError:
+        first_json = extract_first_json(raw_message)
+        if not first_json:
+            return None, {"error": "❌ No valid JSON object in GPT response"}
+        try:
+            return json.loads(first_json), None
+        except json.JSONDecodeError as e:
+            return None, {
+                "error": f"❌ Failed to parse JSON: {str(e)}",
+                "raw": first_json,
+            }
+
+
+async def log_chat(user_prompt, raw_message, session_id=None):
+    # Queued and written in batches; never waits on Mongo
+    await chat_log.write(
+        {
+            "session_id": session_id,
+            "user_message": user_prompt,
+            "bot_response": raw_message,
+            "timestamp": datetime.utcnow(),
+        }
+    )
+
+
+async def _no_progress(stage, data=None):
+    pass
+
+
+def sse_event(stage, data=None):
+    return f"event: {stage}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def action_label(parsed_data):
+    """Metric label for an action; anything the LLM invents becomes "other"."""
+    if not isinstance(parsed_data, dict):
+        return "other"
+    if plan_actions(parsed_data) is not None:
+        return "multi"
+    action = str(parsed_data.get("action", "schedule")).lower()
+    return action if action in ACTION_REQUIRED_FIELDS else "other"
+
+
+def is_error_result(result):
+    if not isinstance(result, dict):
+        return True
+    return "error" in result or str(result.get("response", "")).startswith("❌")
+
+
+@contextmanager
+def stage(endpoint, name):
+    """One step of a chat request: timed for /metrics and traced as a span."""
+    with tracer.span(name), chat_stage_seconds.time(endpoint=endpoint, stage=name):
+        yield
+
+
+async def run_action(endpoint, credentials_dict, parsed_data, progress=_no_progress):
+    """dispatch_action, timed per action and counted when it fails."""
+    action = action_label(parsed_data)
+    with tracer.span("action", action=action), action_seconds.time(action=action):
+        result = await dispatch_action(credentials_dict, parsed_data, progress)
+    if is_error_result(result):
+        chat_errors.inc(endpoint=endpoint, action=action, stage="dispatch")
+    return result
+
+
+async def run_plan(endpoint, credentials_dict, actions, progress=_no_progress):
+    """
+    Several actions from one message, answered together. Each action waits
+    only for the earlier ones touching the same day (see app.action_plan);
+    the rest hit Google concurrently.
+    """
+    with tracer.span("plan", actions=len(actions)):
+        results = await execute_plan(
+            actions,
+            lambda action: run_action(endpoint, credentials_dict, action, progress),
+        )
+
+    combined = []
+    for action, result in zip(actions, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "Planned action failed",
+                exc_info=result,
+                extra=fields(action=action_label(action)),
             )
-            content = res.json()
-            print("📦 Full OpenRouter API Response:", content)
-    except Exception as e:
-        traceback.print_exc()
-        return {"error": f"❌ Failed to fetch from LLM API: {str(e)}"}
+        if not isinstance(result, dict):
+            result = {"error": "⚠️ Something went wrong handling that request."}
+        combined.append({"action": action_label(action), **result})
+
+    failed = sum(is_error_result(result) for result in combined)
+    message = f"✅ Handled {len(combined)} requests."
+    if failed:
+        message = f"⚠️ {failed} of {len(combined)} requests failed."
+    return {"multi_action": True, "message": message, "results": combined}
+
+
+async def run_request(endpoint, credentials_dict, parsed_data, progress=_no_progress):
+    """Carry out what the message asked for: one action or a plan of several."""
+    actions = plan_actions(parsed_data)
+    if actions is None:
+        return await run_action(endpoint, credentials_dict, parsed_data, progress)
+    if len(actions) == 1:
+        return await run_action(endpoint, credentials_dict, actions[0], progress)
+    return await run_plan(endpoint, credentials_dict, actions, progress)
+
+
+@router.post("/chat")
+async def chat_with_gpt(request: Request):
+    body = await request.json()
+    user_prompt = body.get("message")
+    with stage("chat", "credentials"):
+        credentials_dict = await credential_store.get("demo_user")
+
+    if not credentials_dict:
+        chat_errors.inc(endpoint="chat", action="none", stage="credentials")
+        return {"error": "❌ No credentials found. Please log in first."}
+
+    with stage("chat", "dates"):
+        user_prompt = replace_natural_dates(user_prompt)
+
+    with stage("chat", "lookup"):
+        cache_key, payload = prepare_llm_request(user_prompt)
+        parsed_data = lookup_action(user_prompt, cache_key)
+
+    if parsed_data is None:
+        try:
+            # Shared keep-alive client; 429/5xx and timeouts are retried inside
+            with stage("chat", "llm"):
+                content = await llm_client.chat_completion(payload)
+            log_payload(logger, "OpenRouter response", response=content)
+        except Exception as e:
+            logger.exception("LLM request failed")
+            chat_errors.inc(endpoint="chat", action="none", stage="llm")
+            return {"error": f"❌ Failed to fetch from LLM API: {str(e)}"}
 
     try:
-        if "choices" not in content or not content["choices"]:
+        if parsed_data is not None:
+            # ⚡/♻️ Fast path or cache hit: no LLM call was needed
+            raw_message = json.dumps(parsed_data)
+        elif "choices" not in content or not content["choices"]:
+            chat_errors.inc(endpoint="chat", action="none", stage="llm")
             return {
                 "error": "❌ LLM response missing 'choices'",
                 "raw_response": content,
             }
-        raw_message = content["choices"][0]["message"]["content"]
-        print("🧠 LLM Raw Response:\n", raw_message)
-
-        chat_collection.insert_one(
-            {
-                "user_message": user_prompt,
-                "bot_response": raw_message,
-                "timestamp": datetime.utcnow(),
-            }
-        )
+        else:
+            raw_message = content["choices"][0]["message"]["content"]
+            log_payload(logger, "LLM raw response", raw=raw_message)
+
+        with stage("chat", "log"):
+            await log_chat(user_prompt, raw_message, body.get("session_id"))
+
+        if parsed_data is None:
+            with stage("chat", "parse"):
+                parsed_data, error = parse_llm_message(raw_message)
+            if error:
+                chat_errors.inc(endpoint="chat", action="none", stage="parse")
+                return error
+            if isinstance(parsed_data, dict):
+                llm_cache.set(cache_key, parsed_data)
+    except Exception:
+        logger.exception("Failed to handle the LLM response")
+        chat_errors.inc(endpoint="chat", action="none", stage="parse")
+        return
+
+    return await run_request("chat", credentials_dict, parsed_data)
 
-        try:
-            parsed_data = json.loads(raw_message)
-        except json.JSONDecodeError:
-            first_json = extract_first_json(raw_message)
-            if not first_json:
-                return {"error": "❌ No valid JSON object in GPT response"}
-            try:
-                parsed_data = json.loads(first_json)
-            except json.JSONDecodeError as e:
-                return {
-                    "error": f"❌ Failed to parse JSON: {str(e)}",
-                    "raw": first_json,
-                }
 
+async def dispatch_action(credentials_dict, parsed_data, progress=_no_progress):
+    """
+    Run one parsed action against the calendar and build the chat response.
+
+    `progress(stage, data)` is awaited as each step finishes so /chat/stream
+    can report it; /chat ignores it.
+    """
+    try:
         parsed_data.setdefault("title", "Meeting")
         parsed_data.setdefault("participants", [])
         parsed_data.setdefault("action", "schedule")
@@ -346,8 +557,8 @@ async def chat_with_gpt(request: Request):
             except Exception as e:
                 return {"error": f"❌ Failed to parse 'start_time': {str(e)}"}
 
-            delete_result = await run_in_threadpool(
-                delete_event,
+            await progress("deleting", {"date": date, "start_range": start_range})
+            delete_result = await delete_event(
                 credentials_dict,
                 date,
                 start_range,
@@ -373,12 +584,15 @@ async def chat_with_gpt(request: Request):
             if not date:
                 return {"error": "❌ Date is required to delete all events on a day."}
 
-            result = await run_in_threadpool(
-                delete_all_events_on_date, credentials_dict, date
-            )
+            await progress("deleting", {"date": date})
+            result = await delete_all_events_on_date(credentials_dict, date)
+
+            message = f"🧹 Deleted {result['total_deleted']} events on {date}."
+            if result["failed_events"]:
+                message += f" ⚠️ {len(result['failed_events'])} could not be deleted."
 
             return {
-                "message": f"🧹 Deleted {result['total_deleted']} events on {date}.",
+                "message": message,
                 "details": result,
             }
 
@@ -394,7 +608,8 @@ async def chat_with_gpt(request: Request):
                 end = datetime.strptime(parsed_data["end_range"], fmt)
                 parsed_data["duration"] = int((end - start).total_seconds() // 60)
 
-            validated = EventData(**parsed_data)
+            with tracer.span("validate", schema="EventData"):
+                validated = EventData(**parsed_data)
             event_data = validated.dict()
 
             if not event_data["title"] or event_data["title"].lower() == "event":
@@ -404,29 +619,50 @@ async def chat_with_gpt(request: Request):
                     else "Scheduled Meeting"
                 )
 
-            free_slot = await run_in_threadpool(
-                find_free_slot,
+            await progress("checking_availability", event_data)
+            free_slot = await find_free_slot(
                 credentials_dict,
                 event_data["date"],
                 event_data["start_range"],
                 event_data["end_range"],
                 event_data["duration"],
+                event_data["step"],
+                event_data["participants"],
             )
 
             if free_slot:
-                created = await run_in_threadpool(
-                    create_calendar_event,
+                await progress("candidate_slot", free_slot)
+                created = await create_calendar_event(
                     credentials_dict,
                     event_data["title"],
                     free_slot["start"],
                     free_slot["end"],
                     event_data["participants"],
                 )
+                await progress("created", created)
                 return {
                     "event_created": True,
                     "details": created,
                     "event_data": event_data,
                 }
+            elif event_data["participants"]:
+                # Explain which attendees made every slot unusable
+                availability = await get_availability(
+                    credentials_dict,
+                    event_data["date"],
+                    event_data["start_range"],
+                    event_data["end_range"],
+                    event_data["duration"],
+                    event_data["step"],
+                    event_data["participants"],
+                )
+                return {
+                    "message": "❌ No time slot is free for all participants.",
+                    "blocked_slots": availability["blocked_slots"],
+                    "unavailable_participants": availability[
+                        "unavailable_participants"
+                    ],
+                }
             else:
                 return {"message": "❌ No available time slot found."}
 
@@ -435,9 +671,9 @@ async def chat_with_gpt(request: Request):
             original = parsed_data.get("original_event")
             updates = parsed_data.get("updated_fields")
 
-            print("🛠 Parsed Action:", action)
-            print("🧾 Original Event:", original)
-            print("✏️ Updates:", updates)
+            logger.debug(
+                "Update requested", extra=fields(original=original, updates=updates)
+            )
 
             if not original or not updates:
                 return {
@@ -448,9 +684,9 @@ async def chat_with_gpt(request: Request):
             if not start_time_str or "T" not in start_time_str:
                 return {"response": f"❌ Invalid start_time format: '{start_time_str}'"}
 
+            await progress("updating", original)
             try:
-                event_to_update = await run_in_threadpool(
-                    find_event_by_title_and_start_time,
+                event_to_update = await find_event_by_title_and_start_time(
                     credentials_dict,
                     original.get("title"),
                     original.get("start_time"),
@@ -462,8 +698,7 @@ async def chat_with_gpt(request: Request):
                 return {"response": "❌ No matching event found to update."}
 
             try:
-                updated_event = await run_in_threadpool(
-                    update_event_fields,
+                updated_event = await update_event_fields(
                     credentials_dict,
                     event_to_update,
                     updates,
@@ -478,8 +713,30 @@ async def chat_with_gpt(request: Request):
 
         # ⏱️ FREE SLOT
         elif action in ("check", "check_free_time"):
-            validated = FreeSlotRequest(**parsed_data)
+            with tracer.span("validate", schema="FreeSlotRequest"):
+                validated = FreeSlotRequest(**parsed_data)
             slot_req = validated.dict()
+            await progress("checking_availability", slot_req)
+
+            # 📆 RANGE: one freebusy query for the whole span, slots grouped by day
+            if validated.is_range:
+                slots_by_day = await get_free_slots_for_range(
+                    credentials_dict,
+                    slot_req["start_date"],
+                    slot_req["end_date"],
+                    slot_req["start_range"],
+                    slot_req["end_range"],
+                    slot_req["duration"],
+                    slot_req["step"],
+                    slot_req["participants"],
+                )
+                total = sum(len(slots) for slots in slots_by_day.values())
+                return {
+                    "event_created": False,
+                    "message": f"🕒 Found {total} free slots from {slot_req['start_date']} to {slot_req['end_date']}:",
+                    "free_slots_by_day": slots_by_day,
+                }
+
             requested_date = datetime.strptime(slot_req["date"], "%Y-%m-%d").date()
             now = datetime.now()
 
@@ -497,13 +754,29 @@ async def chat_with_gpt(request: Request):
                     slot_req["start_range"] = new_start
                     parsed_data["start_range"] = new_start
 
-            free_slots = await run_in_threadpool(
-                get_all_free_slots,
+            if slot_req["participants"]:
+                availability = await get_availability(
+                    credentials_dict,
+                    slot_req["date"],
+                    slot_req["start_range"],
+                    slot_req["end_range"],
+                    slot_req["duration"],
+                    slot_req["step"],
+                    slot_req["participants"],
+                )
+                return {
+                    "event_created": False,
+                    "message": f"🕒 Found {len(availability['free_slots'])} slots free for everyone:",
+                    **availability,
+                }
+
+            free_slots = await get_all_free_slots(
                 credentials_dict,
                 slot_req["date"],
                 slot_req["start_range"],
                 slot_req["end_range"],
                 slot_req["duration"],
+                slot_req["step"],
             )
 
             return {
@@ -517,31 +790,215 @@ async def chat_with_gpt(request: Request):
             return {"error": f"⚠️ Unexpected action: {action}", "raw_data": parsed_data}
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Action failed", extra=fields(action=action_label(parsed_data)))
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: Request):
+    """
+    /chat as Server-Sent Events: one event per stage (parsing, action,
+    checking_availability, candidate_slot, created, ...) and a final
+    "result" carrying the same payload /chat returns.
+    """
+    body = await request.json()
+    user_prompt = body.get("message")
+    with stage("chat_stream", "credentials"):
+        credentials_dict = await credential_store.get("demo_user")
+
+    async def events():
+        if not credentials_dict:
+            chat_errors.inc(endpoint="chat_stream", action="none", stage="credentials")
+            yield sse_event(
+                "error", {"error": "❌ No credentials found. Please log in first."}
+            )
+            return
+
+        with stage("chat_stream", "dates"):
+            prompt = replace_natural_dates(user_prompt)
+        yield sse_event("parsing", {"message": prompt})
+
+        with stage("chat_stream", "lookup"):
+            cache_key, payload = prepare_llm_request(prompt)
+            parsed_data = lookup_action(prompt, cache_key)
+        from_llm = parsed_data is None
+
+        if not from_llm:
+            raw_message = json.dumps(parsed_data)
+        else:
+            try:
+                chunks = []
+                scanner = JSONObjectScanner()
+                with stage("chat_stream", "llm"):
+                    async with aclosing(
+                        llm_client.stream_chat_completion(payload)
+                    ) as deltas:
+                        async for delta in deltas:
+                            chunks.append(delta)
+                            for candidate in scanner.feed(delta):
+                                parsed_data = load_action(candidate)
+                                if parsed_data is not None:
+                                    break
+                            if parsed_data is not None:
+                                # ✂️ Got a usable action: hang up instead of paying for the rest
+                                break
+                raw_message = "".join(chunks)
+                log_payload(logger, "LLM raw response", raw=raw_message)
+            except Exception as e:
+                logger.exception("LLM stream failed")
+                chat_errors.inc(endpoint="chat_stream", action="none", stage="llm")
+                yield sse_event(
+                    "error", {"error": f"❌ Failed to fetch from LLM API: {str(e)}"}
+                )
+                return
+
+        with stage("chat_stream", "log"):
+            await log_chat(prompt, raw_message, body.get("session_id"))
+
+        if from_llm:
+            if parsed_data is None:
+                with stage("chat_stream", "parse"):
+                    parsed_data, error = parse_llm_message(raw_message)
+                if error:
+                    chat_errors.inc(endpoint="chat_stream", action="none", stage="parse")
+                    yield sse_event("error", error)
+                    return
+            if isinstance(parsed_data, dict):
+                llm_cache.set(cache_key, parsed_data)
+
+        yield sse_event("action", parsed_data)
+
+        # dispatch_action reports its stages through the queue while it runs
+        # (for a plan, the stages of its actions interleave)
+        queue = asyncio.Queue()
+
+        async def progress(stage, data=None):
+            await queue.put(sse_event(stage, data))
+
+        task = asyncio.create_task(
+            run_request("chat_stream", credentials_dict, parsed_data, progress)
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        while (event := await queue.get()) is not None:
+            yield event
+
+        result = task.result()
+        if result is None:
+            result = {"error": "⚠️ Something went wrong handling that request."}
+        yield sse_event("result", result)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/calendar/day-schedule")
 async def get_schedule_for_day(date: str, request: Request):
-    credentials_dict = user_tokens.get("demo_user")
+    credentials_dict = await credential_store.get("demo_user")
     if not credentials_dict:
         return {"error": "No credentials found."}
 
-    events = await run_in_threadpool(get_events_for_day, credentials_dict, date)
+    events = await get_events_for_day(credentials_dict, date)
     return {"events": events}
 
 
 @router.get("/calendar/booked")
 async def get_booked_events(date: str, request: Request):
-    credentials_dict = user_tokens.get("demo_user")
+    credentials_dict = await credential_store.get("demo_user")
     if not credentials_dict:
         return {"error": "No credentials found."}
 
-    events = await run_in_threadpool(get_events_for_day, credentials_dict, date)
+    events = await get_events_for_day(credentials_dict, date)
     return {"booked": events}
 
 
 from fastapi import Body, HTTPException
-from googleapiclient.discovery import build
+
+
+@router.get("/chat/cache/stats")
+async def llm_cache_stats():
+    return llm_cache.stats()
+
+
+@router.get("/chat/llm/stats")
+async def llm_pool_stats():
+    return llm_client.stats()
+
+
+@router.get("/chat/log/stats")
+async def chat_log_stats():
+    return chat_log.stats()
+
+
+@router.get("/chat/credentials/stats")
+async def credential_cache_stats():
+    return credential_store.stats()
+
+
+@router.get("/calendar/reads/stats")
+async def calendar_read_stats():
+    return calendar_reads.stats()
+
+
+@router.get("/chat/fastpath/stats")
+async def intent_fast_path_stats():
+    return fast_path_stats()
+
+
+# Queues worth watching next to the latency histograms
+registry.gauge(
+    "schedulai_chat_log_queue_depth",
+    "Chat log entries waiting to be written to Mongo.",
+    lambda: chat_log.stats()["queued"],
+)
+registry.gauge(
+    "schedulai_llm_in_flight",
+    "OpenRouter requests currently in flight.",
+    lambda: llm_client.in_flight,
+)
+registry.gauge(
+    "schedulai_log_queue_depth",
+    "Log records waiting for the writer thread.",
+    lambda: app_logging.stats()["queued"],
+)
+registry.gauge(
+    "schedulai_log_records_dropped",
+    "Log records dropped because the log queue was full.",
+    lambda: app_logging.stats()["dropped"],
+)
+
+
+@router.get("/chat/traces")
+async def recent_traces(limit: int = 20, min_ms: float = 0.0, slowest: bool = False):
+    # Waterfalls of recent /chat requests; slowest=true for the tail
+    if not isinstance(tracer.exporter, InMemoryExporter):
+        raise HTTPException(
+            status_code=404, detail="Traces are exported elsewhere (TRACE_EXPORTER)."
+        )
+    return {"traces": tracer.exporter.recent(limit, min_ms, slowest)}
+
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus text format, for scraping
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.post("/calendar/notifications")
+async def calendar_notifications(request: Request):
+    # Google Calendar push callback: headers only, the body is empty
+    result = channel_registry.handle_notification(
+        request.headers.get("X-Goog-Channel-ID"),
+        request.headers.get("X-Goog-Channel-Token"),
+        request.headers.get("X-Goog-Resource-ID"),
+        request.headers.get("X-Goog-Resource-State"),
+    )
+    if result == "unknown":
+        raise HTTPException(status_code=404, detail="Unknown channel")
+    if result == "forbidden":
+        raise HTTPException(status_code=403, detail="Invalid channel token")
+    return {"status": "ok"}
 
 
 class CredentialsPayload(BaseModel):
@@ -556,12 +1013,13 @@ class CredentialsPayload(BaseModel):
 @router.delete("/calendar/event/{event_id}")
 async def delete_event_by_id(event_id: str, credentials: CredentialsPayload):
     try:
-        creds = Credentials(**credentials.dict())
-        service = build("calendar", "v3", credentials=creds)
-        service.events().delete(calendarId="primary", eventId=event_id).execute()
+        # Also drops it from the event store, so /calendar/booked stops showing it
+        await calendar_utils.delete_event_by_id(credentials.dict(), event_id)
         return {"status": "deleted"}
     except Exception as e:
-        print(f"Error deleting event: {e}")
+        logger.warning(
+            "Error deleting event", extra=fields(event_id=event_id, error=str(e))
+        )
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -572,30 +1030,16 @@ async def clear_chat_logs():
 
 
 @router.get("/user_calendar_events")
-def get_calendar_events(user_id: str):
+async def get_calendar_events(user_id: str):
     try:
-        from app.calendar_utils import load_credentials_for_user
-        from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
-        from datetime import datetime
-
-        credentials_dict = load_credentials_for_user(user_id)
-        creds = Credentials(**credentials_dict)
-        service = build("calendar", "v3", credentials=creds)
-
-        events_result = (
-            service.events()
-            .list(
-                calendarId="primary",
-                timeMin=datetime.utcnow().isoformat() + "Z",
-                maxResults=20,
-                singleEvents=True,
-                orderBy="startTime",
-            )
-            .execute()
-        )
+        from app.calendar_api import get_upcoming_events
+
+        credentials_dict = await credential_store.get(user_id)
+        if not credentials_dict:
+            raise Exception("No credentials found for user.")
+        events = await get_upcoming_events(credentials_dict, max_results=20)
 
-        return {"events": events_result.get("items", [])}
+        return {"events": events}
     except Exception as e:
-        print("❌ Backend error while fetching events:", str(e))
+        logger.exception("Failed to fetch upcoming events")
         raise HTTPException(status_code=500, detail=f"Calendar fetch failed: {str(e)}")
@@ -0,0 +1,102 @@
+import base64
+import os
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from app.mongo_client import async_chat_collection
+
+MESSAGES_PAGE_SIZE = int(os.getenv("MESSAGES_PAGE_SIZE", "50"))
+MESSAGES_MAX_PAGE_SIZE = int(os.getenv("MESSAGES_MAX_PAGE_SIZE", "200"))
+
+# Only what the history view renders
+MESSAGE_FIELDS = {
+    "session_id": 1,
+    "sender": 1,
+    "message": 1,
+    "user_message": 1,
+    "bot_response": 1,
+    "timestamp": 1,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+async def ensure_indexes(collection=async_chat_collection):
+    # _id breaks ties between messages logged in the same millisecond
+    await collection.create_index(
+        [("session_id", ASCENDING), ("timestamp", ASCENDING), ("_id", ASCENDING)],
+        name="session_id_timestamp",
+    )
+
+
+def encode_cursor(doc):
+    raw = f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, oid = raw.split("|")
+        return datetime.fromisoformat(timestamp), ObjectId(oid)
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def _keyset(cursor, op):
+    """Rows strictly before/after the cursor in (timestamp, _id) order."""
+    timestamp, oid = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"timestamp": {op: timestamp}},
+            {"timestamp": timestamp, "_id": {op: oid}},
+        ]
+    }
+
+
+async def fetch_page(
+    session_id,
+    before=None,
+    after=None,
+    limit=MESSAGES_PAGE_SIZE,
+    collection=async_chat_collection,
+):
+    """
+    One page of a session's history in chronological order.
+
+    Without a cursor this is the newest page; `before` walks back in time,
+    `after` picks up messages newer than a page already shown.
+    """
+    limit = max(1, min(limit, MESSAGES_MAX_PAGE_SIZE))
+    # Rows logged with a null timestamp can't be ordered or used as a cursor
+    query = {"session_id": session_id, "timestamp": {"$ne": None}}
+
+    if after:
+        query.update(_keyset(after, "$gt"))
+        order = ASCENDING
+    else:
+        if before:
+            query.update(_keyset(before, "$lt"))
+        order = DESCENDING
+
+    # Index walk from the cursor: cost depends on the page size, not the collection
+    docs = (
+        await collection.find(query, MESSAGE_FIELDS)
+        .sort([("timestamp", order), ("_id", order)])
+        .limit(limit)
+        .to_list(limit)
+    )
+    if order == DESCENDING:
+        docs.reverse()
+
+    messages = [{**doc, "_id": str(doc["_id"])} for doc in docs]
+    return {
+        "messages": messages,
+        "before": encode_cursor(docs[0]) if docs else before,
+        "after": encode_cursor(docs[-1]) if docs else after,
+        "has_more": len(docs) == limit,
+    }
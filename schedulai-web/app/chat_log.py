@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import logging
+import os
+
+from bson import ObjectId
+
+from app.log import fields
+from app.mongo_client import async_chat_collection
+from app.tracing import tracer
+
+CHAT_LOG_QUEUE_SIZE = int(os.getenv("CHAT_LOG_QUEUE_SIZE", "1000"))
+CHAT_LOG_BATCH_SIZE = int(os.getenv("CHAT_LOG_BATCH_SIZE", "100"))
+# Longest a logged message waits in memory before it is written
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL", "1.0"))
+# "drop": never slow a request down for logging; "block": wait for room
+CHAT_LOG_FULL_POLICY = os.getenv("CHAT_LOG_FULL_POLICY", "drop")
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLogSink:
+    """
+    Bounded in-process queue of chat log documents, drained by one
+    background task that writes them with insert_many.
+    """
+
+    def __init__(
+        self,
+        collection,
+        maxsize=CHAT_LOG_QUEUE_SIZE,
+        batch_size=CHAT_LOG_BATCH_SIZE,
+        flush_interval=CHAT_LOG_FLUSH_INTERVAL,
+        policy=CHAT_LOG_FULL_POLICY,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown chat log policy: {policy}")
+        self.collection = collection
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self._queue = None
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            # In an empty context, so a first write() from a request doesn't
+            # hang every later flush off that request's trace
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        return self._task
+
+    async def write(self, doc):
+        """
+        Queue one document. Returns its _id, or None if it was dropped
+        because the queue is full.
+        """
+        self.start()
+        doc.setdefault("_id", ObjectId())
+        if self.policy == "block":
+            await self._queue.put(doc)
+        else:
+            try:
+                self._queue.put_nowait(doc)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return None
+        return doc["_id"]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    doc = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if doc is _STOP:
+                    stopping = True
+                    break
+                batch.append(doc)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch):
+        # Only a span: as a trace of its own every flush would push /chat
+        # traces out of the in-memory ring. Recorded when a caller traces it
+        try:
+            with tracer.span("chat_log.insert_many", documents=len(batch)):
+                # ordered=False: one bad document doesn't cost the rest of the batch
+                result = await self.collection.insert_many(batch, ordered=False)
+            self.written += len(result.inserted_ids)
+        except Exception as e:
+            written = (getattr(e, "details", None) or {}).get("nInserted", 0)
+            self.written += written
+            self.failed += len(batch) - written
+            logger.warning(
+                "Failed to write chat log entries",
+                extra=fields(count=len(batch) - written, error=str(e)),
+            )
+        self.batches += 1
+
+    async def stop(self):
+        """Write everything queued so far, then stop the background task."""
+        if self._task is None or self._task.done():
+            return
+        # Sits behind everything already queued, so those get flushed first
+        await self._queue.put(_STOP)
+        await self._task
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+chat_log = ChatLogSink(async_chat_collection)
@@ -8,3 +8,9 @@ GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 REDIRECT_URI = os.getenv("REDIRECT_URI")
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+# Minutes between candidate free-slot start times (e.g. 5, 15 or 30)
+SLOT_STEP_MINUTES = int(os.getenv("SLOT_STEP_MINUTES", "30"))
+
+# Times an update is re-fetched and retried after losing an ETag race (412)
+UPDATE_CONFLICT_RETRIES = int(os.getenv("UPDATE_CONFLICT_RETRIES", "2"))
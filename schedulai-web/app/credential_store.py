@@ -0,0 +1,87 @@
+import os
+
+from cachetools import TTLCache
+
+from app.calendar_pool import calendar_pool
+from app.mongo_client import async_client
+
+CREDENTIALS_DB = os.getenv("CREDENTIALS_DB", "schedulai_db")
+CREDENTIAL_CACHE_SIZE = int(os.getenv("CREDENTIAL_CACHE_SIZE", "1024"))
+# Credentials only change at login or on a token refresh (both write
+# through), so this can be long
+CREDENTIAL_CACHE_TTL_SECONDS = int(os.getenv("CREDENTIAL_CACHE_TTL_SECONDS", "300"))
+
+
+class CredentialStore:
+    """
+    The one place OAuth credentials are read and written: Mongo `users`
+    (unique on user_id) with a TTL'd in-process cache in front.
+    """
+
+    def __init__(
+        self,
+        collection,
+        maxsize=CREDENTIAL_CACHE_SIZE,
+        ttl=CREDENTIAL_CACHE_TTL_SECONDS,
+    ):
+        self.collection = collection
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("user_id", unique=True)
+        await self.collection.create_index("credentials.refresh_token")
+
+    async def get(self, user_id):
+        """Stored credentials dict for the user, or None if they never logged in."""
+        credentials = self._cache.get(user_id)
+        if credentials is not None:
+            self.hits += 1
+            return credentials
+
+        self.misses += 1
+        user = await self.collection.find_one(
+            {"user_id": user_id}, {"credentials": 1, "_id": 0}
+        )
+        if not user or "credentials" not in user:
+            return None
+        self._cache[user_id] = user["credentials"]
+        return user["credentials"]
+
+    async def save(self, user_id, credentials):
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$set": {"credentials": credentials}},
+            upsert=True,
+        )
+        self._cache[user_id] = credentials
+
+    async def save_token(self, credentials, token):
+        """Store an access token refreshed with these credentials' refresh token."""
+        refresh_token = credentials.get("refresh_token")
+        if not refresh_token:
+            return
+        await self.collection.update_many(
+            {"credentials.refresh_token": refresh_token},
+            {"$set": {"credentials.token": token}},
+        )
+        for user_id, cached in list(self._cache.items()):
+            if cached.get("refresh_token") == refresh_token:
+                self._cache[user_id] = {**cached, "token": token}
+
+    def invalidate(self, user_id):
+        self._cache.pop(user_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+credential_store = CredentialStore(async_client[CREDENTIALS_DB]["users"])
+calendar_pool.token_store = credential_store
@@ -0,0 +1,281 @@
+import asyncio
+import bisect
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil import parser
+
+from app.calendar_client import CalendarAPIError, calendar_client
+from app.calendar_pool import credentials_key
+from app.singleflight import calendar_reads
+
+# Reads newer than this are served from memory without asking Google
+EVENT_SYNC_INTERVAL_SECONDS = float(os.getenv("EVENT_SYNC_INTERVAL_SECONDS", "30"))
+# With a live push channel Google tells us about changes, so poll far less
+PUSH_SYNC_INTERVAL_SECONDS = float(os.getenv("PUSH_SYNC_INTERVAL_SECONDS", "600"))
+# Users whose store hasn't been read for this long are dropped
+EVENT_STORE_IDLE_SECONDS = float(os.getenv("EVENT_STORE_IDLE_SECONDS", "1800"))
+SYNC_PAGE_SIZE = 2500
+# The mirrored window; reads outside it go to Google directly
+EVENT_WINDOW_PAST_DAYS = int(os.getenv("EVENT_WINDOW_PAST_DAYS", "30"))
+EVENT_WINDOW_FUTURE_DAYS = int(os.getenv("EVENT_WINDOW_FUTURE_DAYS", "365"))
+# Re-anchor the window on "now" with a full sync once it is this old
+EVENT_WINDOW_REFRESH_SECONDS = float(os.getenv("EVENT_WINDOW_REFRESH_SECONDS", "86400"))
+
+LOCAL_TZ = pytz.timezone("Asia/Dubai")
+
+
+def event_bounds(event, local_tz=LOCAL_TZ):
+    """Aware (start, end) for timed and all-day events, or None if unusable."""
+    bounds = []
+    for field in ("start", "end"):
+        value = event.get(field) or {}
+        if value.get("dateTime"):
+            dt = parser.isoparse(value["dateTime"])
+            if dt.tzinfo is None:
+                dt = local_tz.localize(dt)
+        elif value.get("date"):
+            dt = local_tz.localize(datetime.strptime(value["date"], "%Y-%m-%d"))
+        else:
+            return None
+        bounds.append(dt)
+    return tuple(bounds)
+
+
+class UserEventStore:
+    """
+    One user's primary calendar, for a window around today, mirrored in
+    memory and kept fresh via syncToken.
+
+    Bounds are parsed once when an event arrives; reads binary-search a
+    start-ordered index instead of parsing every cached event.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.events = {}  # id -> (start, end, event), bounds as epoch seconds
+        self._index = []  # sorted (start, id)
+        self._longest = 0.0  # longest event seen, to widen the search back
+        self.window = None  # (time_min, time_max) of the last full sync
+        self.anchored_at = 0.0
+        self.sync_token = None
+        self.last_sync = 0.0
+        self.last_used = time.monotonic()
+        self.stale = True
+        self.lock = asyncio.Lock()
+
+    def reset(self, window):
+        self.events = {}
+        self._index = []
+        self._longest = 0.0
+        self.window = window
+        self.anchored_at = time.time()
+        self.sync_token = None
+
+    def covers(self, time_min, time_max):
+        if self.window is None:
+            return False
+        lo, hi = self.window
+        return time_min >= lo and (time_max is None or time_max <= hi)
+
+    def upsert(self, event):
+        self.remove(event["id"])
+        if event.get("status") == "cancelled":
+            return
+        bounds = event_bounds(event)
+        if not bounds:
+            return
+        start, end = (dt.timestamp() for dt in bounds)
+        self.events[event["id"]] = (start, end, event)
+        bisect.insort(self._index, (start, event["id"]))
+        self._longest = max(self._longest, end - start)
+
+    def remove(self, event_id):
+        entry = self.events.pop(event_id, None)
+        if entry is not None:
+            i = bisect.bisect_left(self._index, (entry[0], event_id))
+            del self._index[i]
+
+    def between(self, time_min, time_max):
+        """Events overlapping [time_min, time_max), ordered by start like orderBy=startTime."""
+        lo = time_min.timestamp()
+        hi = float("inf") if time_max is None else time_max.timestamp()
+        # Nothing that starts before lo - longest can still be running at lo
+        i = bisect.bisect_left(self._index, (lo - self._longest,))
+        j = bisect.bisect_left(self._index, (hi,))
+        hits = []
+        for _, event_id in self._index[i:j]:
+            start, end, event = self.events[event_id]
+            if end > lo:
+                hits.append(event)
+        return hits
+
+
+class EventStore:
+    """
+    Per-user event cache: one full sync, then incremental syncs with
+    nextSyncToken. Our own writes are applied directly so they show up
+    without a round trip.
+    """
+
+    def __init__(
+        self,
+        sync_interval=EVENT_SYNC_INTERVAL_SECONDS,
+        idle_seconds=EVENT_STORE_IDLE_SECONDS,
+    ):
+        self.sync_interval = sync_interval
+        self.idle_seconds = idle_seconds
+        self._users = {}
+        # Set by app.calendar_watch: anything with push_active(user_key)
+        self.push_channels = None
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self.memory_reads = 0
+        self.direct_reads = 0
+
+    def _store(self, credentials_dict):
+        now = time.monotonic()
+        for key in [
+            k for k, s in self._users.items() if now - s.last_used > self.idle_seconds
+        ]:
+            del self._users[key]
+
+        key = credentials_key(credentials_dict)
+        store = self._users.get(key)
+        if store is None:
+            store = self._users[key] = UserEventStore(key)
+        store.last_used = now
+        return store
+
+    def _push_active(self, store):
+        # Asked on every read: channels expire without any notification
+        return self.push_channels is not None and self.push_channels.push_active(
+            store.key
+        )
+
+    def _needs_sync(self, store):
+        interval = (
+            PUSH_SYNC_INTERVAL_SECONDS
+            if self._push_active(store)
+            else self.sync_interval
+        )
+        return store.stale or time.monotonic() - store.last_sync > interval
+
+    async def _fresh_store(self, credentials_dict):
+        store = self._store(credentials_dict)
+        if self._needs_sync(store):
+            async with store.lock:
+                # Someone else may have synced while we waited for the lock
+                if self._needs_sync(store):
+                    await self._sync(store, calendar_client(credentials_dict))
+                    return store
+        self.memory_reads += 1
+        return store
+
+    async def _sync(self, store, client):
+        window_age = time.time() - store.anchored_at
+        if store.sync_token and window_age < EVENT_WINDOW_REFRESH_SECONDS:
+            try:
+                await self._pull(store, client, syncToken=store.sync_token)
+                self.incremental_syncs += 1
+                store.stale = False
+                return
+            except CalendarAPIError as e:
+                # 410 Gone: the token expired, start over with a full sync
+                if e.status_code != 410:
+                    raise
+
+        now = datetime.now(pytz.utc)
+        store.reset(
+            (
+                now - timedelta(days=EVENT_WINDOW_PAST_DAYS),
+                now + timedelta(days=EVENT_WINDOW_FUTURE_DAYS),
+            )
+        )
+        await self._pull(
+            store,
+            client,
+            timeMin=store.window[0].isoformat(),
+            timeMax=store.window[1].isoformat(),
+        )
+        self.full_syncs += 1
+        store.stale = False
+
+    async def _pull(self, store, client, **params):
+        page_token = None
+        while True:
+            page = await client.list_events(
+                singleEvents=True,
+                showDeleted=bool(params.get("syncToken")),
+                maxResults=SYNC_PAGE_SIZE,
+                **params,
+                **({"pageToken": page_token} if page_token else {}),
+            )
+            for event in page.get("items", []):
+                store.upsert(event)
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                store.sync_token = page.get("nextSyncToken", store.sync_token)
+                store.last_sync = time.monotonic()
+                return
+
+    async def events_between(self, credentials_dict, time_min, time_max=None):
+        store = await self._fresh_store(credentials_dict)
+        if time_max is not None and not store.covers(time_min, time_max):
+            return await self._fetch(
+                calendar_client(credentials_dict), time_min, time_max
+            )
+        return store.between(time_min, time_max)
+
+    async def _fetch(self, client, time_min, time_max):
+        """Events outside the mirrored window, straight from Google."""
+        self.direct_reads += 1
+        events, page_token = [], None
+        while True:
+            page = await client.list_events(
+                singleEvents=True,
+                orderBy="startTime",
+                timeMin=time_min.isoformat(),
+                timeMax=time_max.isoformat(),
+                maxResults=SYNC_PAGE_SIZE,
+                **({"pageToken": page_token} if page_token else {}),
+            )
+            events += page.get("items", [])
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return events
+
+    async def upcoming(self, credentials_dict, max_results=10):
+        now = datetime.now(pytz.utc)
+        return (await self.events_between(credentials_dict, now))[:max_results]
+
+    def apply_write(self, credentials_dict, event):
+        self._store(credentials_dict).upsert(event)
+        calendar_reads.forget(credentials_key(credentials_dict))
+
+    def apply_delete(self, credentials_dict, event_id):
+        self._store(credentials_dict).remove(event_id)
+        calendar_reads.forget(credentials_key(credentials_dict))
+
+    def invalidate(self, credentials_dict=None, key=None):
+        """Force the next read for this user to resync with Google."""
+        key = key or credentials_key(credentials_dict or {})
+        store = self._users.get(key)
+        if store:
+            store.stale = True
+        calendar_reads.forget(key)
+
+    def stats(self):
+        return {
+            "users": len(self._users),
+            "events": sum(len(s.events) for s in self._users.values()),
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "memory_reads": self.memory_reads,
+            "direct_reads": self.direct_reads,
+        }
+
+
+event_store = EventStore()
@@ -0,0 +1,254 @@
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytz
+
+# Runs after replace_natural_dates, so dates are already YYYY-MM-DD.
+# Every pattern must match the whole message; anything looser goes to the LLM.
+
+LOCAL_TZ = pytz.timezone("Asia/Dubai")
+DEFAULT_DURATION = 60
+
+DATE = r"(?P<{name}>\d{{4}}-\d{{2}}-\d{{2}})"
+TIME = r"(?P<{name}>noon|midnight|\d{{1,2}}(?::\d{{2}})?\s*(?:am|pm)?)"
+EVENT_NOUN = r"(?:meetings?|events?|calls?|appointments?|syncs?)"
+SINGULAR_NOUN = r"(?:meeting|event|call|appointment|sync)"
+PLURAL_NOUN = r"(?:meetings|events|calls|appointments|syncs)"
+TITLE = r"(?:(?:titled|called|named)\s+)?['\"](?P<title>[^'\"]+)['\"]"
+EMAIL = r"[\w.+-]+@[\w-]+\.[\w.-]+"
+EMAILS = rf"(?P<emails>{EMAIL}(?:(?:\s*,\s*(?:and\s+)?|\s+and\s+){EMAIL})*)"
+
+
+def _date(name="date"):
+    return DATE.format(name=name)
+
+
+def _time(name):
+    return TIME.format(name=name)
+
+
+RULES = [
+    # delete all meetings on 2025-07-19 / clear my calendar on 2025-07-19
+    # Deletes a whole day in one go, so it needs an unmistakable "all":
+    # "cancel my meeting on ..." (one event) must go to the LLM
+    (
+        "delete_all",
+        re.compile(
+            rf"(?:delete|remove|cancel|clear)\s+"
+            rf"(?:all\s+(?:(?:of\s+)?(?:my|the)\s+)?{PLURAL_NOUN}|every\s+{SINGULAR_NOUN}"
+            rf"|(?:my\s+|the\s+)?(?:calendar|schedule))\s+(?:on|for)\s+{_date()}",
+            re.I,
+        ),
+    ),
+    # free slots on 2025-07-20 from 10 to 16 (for 30 minutes)
+    (
+        "check",
+        re.compile(
+            rf"(?:what are |show(?: me)? |find |list )?(?:my )?"
+            rf"(?:free (?:slots?|time)|availability|available (?:slots?|times?))"
+            rf"\s+(?:on|for)\s+{_date()}"
+            rf"(?:\s+(?:from|between)\s+{_time('start')}\s+(?:to|and|-)\s+{_time('end')})?"
+            rf"(?:\s+for\s+(?P<duration>\d+)\s*(?P<unit>min(?:ute)?s?|hours?|h))?",
+            re.I,
+        ),
+    ),
+    # free slots from 2025-07-20 to 2025-07-26
+    (
+        "check_range",
+        re.compile(
+            rf"(?:what are |show(?: me)? |find |list )?(?:my )?"
+            rf"(?:free (?:slots?|time)|availability|available (?:slots?|times?))"
+            rf"\s+(?:from|between)\s+{_date('start_date')}\s+(?:to|and|-)\s+{_date('end_date')}",
+            re.I,
+        ),
+    ),
+    # schedule a meeting 'Design Review' with a@x.com on 2025-07-20 from 3pm to 4pm
+    (
+        "create",
+        re.compile(
+            rf"(?:schedule|book|create|set up|add)\s+(?:a\s+|an\s+)?(?:{EVENT_NOUN}\s*)?"
+            rf"(?:{TITLE}\s*)?(?:with\s+{EMAILS}\s+)?on\s+{_date()}\s+"
+            rf"(?:at\s+{_time('at')}|(?:from|between)\s+{_time('start')}\s+(?:to|and|-)\s+{_time('end')})",
+            re.I,
+        ),
+    ),
+    # delete the meeting 'Strategy Call' on 2025-07-15 at 7pm
+    (
+        "delete",
+        re.compile(
+            rf"(?:delete|remove|cancel)\s+(?:the\s+|my\s+)?(?:{EVENT_NOUN}\s*)?"
+            rf"(?:{TITLE}\s*)?on\s+{_date()}\s+at\s+{_time('at')}",
+            re.I,
+        ),
+    ),
+    # move the 3pm meeting on 2025-07-16 to (2025-07-18 at) 6pm
+    (
+        "move",
+        re.compile(
+            rf"(?:move|reschedule|shift)\s+(?:the\s+|my\s+)?{_time('at')}\s+(?:{EVENT_NOUN}\s+)?"
+            rf"on\s+{_date()}\s+to\s+(?:{_date('new_date')}\s+)?(?:at\s+)?{_time('new_time')}",
+            re.I,
+        ),
+    ),
+    # rename the 3pm meeting on 2025-07-20 to 'Client Review'
+    (
+        "rename",
+        re.compile(
+            rf"(?:rename|retitle)\s+(?:the\s+|my\s+)?{_time('at')}\s+(?:{EVENT_NOUN}\s+)?"
+            rf"on\s+{_date()}\s+to\s+['\"](?P<new_title>[^'\"]+)['\"]",
+            re.I,
+        ),
+    ),
+]
+
+fast_path_counts = Counter()
+
+
+def parse_time(text):
+    """'3pm', '3:30 pm', '15:00', 'noon' -> 'HH:MM' (None if not a clock time)."""
+    text = text.strip().lower()
+    if text == "noon":
+        return "12:00"
+    if text == "midnight":
+        return "00:00"
+    m = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text)
+    if not m:
+        return None
+    hour, minute, meridiem = int(m.group(1)), int(m.group(2) or 0), m.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif not m.group(2) and hour < 7:
+        # Bare "3" in a scheduling chat almost always means 3pm
+        hour += 12
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _iso(date, hhmm, plus_minutes=0):
+    dt = datetime.strptime(f"{date} {hhmm}", "%Y-%m-%d %H:%M")
+    dt = LOCAL_TZ.localize(dt + timedelta(minutes=plus_minutes))
+    return dt.isoformat()
+
+
+def _add_minutes(hhmm, minutes):
+    dt = datetime.strptime(hhmm, "%H:%M") + timedelta(minutes=minutes)
+    return dt.strftime("%H:%M")
+
+
+def _build(rule, m):
+    g = m.groupdict()
+
+    if rule == "delete_all":
+        return {"action": "delete_all", "date": g["date"]}
+
+    if rule == "check":
+        action = {"action": "check", "date": g["date"]}
+        if g.get("start"):
+            start, end = parse_time(g["start"]), parse_time(g["end"])
+            if not start or not end or end <= start:
+                return None
+            action["start_range"], action["end_range"] = start, end
+        if g.get("duration"):
+            minutes = int(g["duration"])
+            action["duration"] = minutes * 60 if g["unit"].startswith("h") else minutes
+        return action
+
+    if rule == "check_range":
+        return {
+            "action": "check",
+            "start_date": g["start_date"],
+            "end_date": g["end_date"],
+        }
+
+    if rule == "create":
+        if g.get("at"):
+            start = parse_time(g["at"])
+            end = start and _add_minutes(start, DEFAULT_DURATION)
+        else:
+            start, end = parse_time(g["start"]), parse_time(g["end"])
+        if not start or not end or end <= start:
+            return None
+        # findall, not split: "and" also occurs inside addresses (sandra@...)
+        emails = re.findall(EMAIL, g["emails"]) if g.get("emails") else []
+        action = {
+            "action": "create",
+            "date": g["date"],
+            "start_range": start,
+            "end_range": end,
+            "participants": emails,
+        }
+        if g.get("title"):
+            action["title"] = g["title"].strip()
+        return action
+
+    if rule == "delete":
+        start = parse_time(g["at"])
+        if not start:
+            return None
+        action = {"action": "delete", "start_time": _iso(g["date"], start)}
+        if g.get("title"):
+            action["title"] = g["title"].strip()
+        return action
+
+    if rule == "move":
+        old, new = parse_time(g["at"]), parse_time(g["new_time"])
+        if not old or not new:
+            return None
+        new_date = g.get("new_date") or g["date"]
+        return {
+            "action": "update",
+            "original_event": {"start_time": _iso(g["date"], old)},
+            "updated_fields": {
+                "start_time": _iso(new_date, new),
+                "end_time": _iso(new_date, new, DEFAULT_DURATION),
+            },
+        }
+
+    if rule == "rename":
+        old = parse_time(g["at"])
+        if not old:
+            return None
+        return {
+            "action": "update",
+            "original_event": {"start_time": _iso(g["date"], old)},
+            "updated_fields": {"title": g["new_title"].strip()},
+        }
+
+    return None
+
+
+def parse_intent(text):
+    """
+    Parse very regular commands without the LLM.
+
+    Returns the same action JSON the LLM would produce, or None when the
+    message doesn't fully match one of the known shapes.
+    """
+    message = re.sub(r"\s+", " ", (text or "").strip()).rstrip(".!?")
+    for rule, pattern in RULES:
+        m = pattern.fullmatch(message)
+        if m:
+            action = _build(rule, m)
+            if action:
+                return action
+    return None
+
+
+def record_source(source):
+    """Count where a /chat message got its action: fast_path, cache or llm."""
+    fast_path_counts[source] += 1
+
+
+def fast_path_stats():
+    total = sum(fast_path_counts.values())
+    return {
+        **fast_path_counts,
+        "total": total,
+        "fast_path_share": (
+            round(fast_path_counts["fast_path"] / total, 4) if total else 0.0
+        ),
+    }
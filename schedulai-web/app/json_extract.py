@@ -0,0 +1,109 @@
+import json
+
+# Fields an action needs before it is worth dispatching (see the system prompt)
+ACTION_REQUIRED_FIELDS = {
+    "create": [("date",)],
+    "schedule": [("date",)],
+    "delete": [("start_time",)],
+    "delete_all": [("date",)],
+    "update": [("original_event", "updated_fields")],
+    "check": [("date",), ("start_date", "end_date")],
+    "check_free_time": [("date",), ("start_date", "end_date")],
+}
+
+
+def is_action(obj):
+    """True for a dict naming a known action with one of its required field sets."""
+    if not isinstance(obj, dict):
+        return False
+    options = ACTION_REQUIRED_FIELDS.get(str(obj.get("action", "")).lower())
+    if not options:
+        return False
+    return any(all(obj.get(field) for field in fields) for fields in options)
+
+
+def plan_actions(obj):
+    """The actions of a {"actions": [...]} plan, or None for a single action."""
+    if not isinstance(obj, dict):
+        return None
+    actions = obj.get("actions")
+    if not isinstance(actions, list) or not actions:
+        return None
+    return actions
+
+
+def is_action_plan(obj):
+    """True for {"actions": [...]} where every item is a usable action."""
+    actions = plan_actions(obj)
+    return actions is not None and all(is_action(action) for action in actions)
+
+
+class JSONObjectScanner:
+    """
+    Finds top-level {...} objects in text that arrives in pieces.
+
+    Braces inside JSON strings (including escaped quotes) don't count, so a
+    title like "Review {draft}" can't end the object early.
+    """
+
+    def __init__(self):
+        self._current = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Consume the next piece of text; returns the objects it completed."""
+        done = []
+        for char in chunk:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._current = [char]
+                continue
+
+            self._current.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    done.append("".join(self._current))
+                    self._current = []
+        return done
+
+
+def load_action(candidate):
+    """Parsed action (or plan of actions) for a candidate object string, or None."""
+    try:
+        obj = json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+    return obj if is_action(obj) or is_action_plan(obj) else None
+
+
+def extract_first_json(text):
+    """
+    The first object in `text` that is a usable action; failing that the
+    first one that parses, and failing that the first balanced candidate.
+    """
+    candidates = JSONObjectScanner().feed(text)
+    for candidate in candidates:
+        if load_action(candidate) is not None:
+            return candidate
+    for candidate in candidates:
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            continue
+    return candidates[0] if candidates else None
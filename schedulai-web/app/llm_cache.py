@@ -0,0 +1,68 @@
+import copy
+import hashlib
+import json
+import os
+
+from cachetools import TTLCache
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+
+
+def normalize_prompt(text):
+    # Whitespace only: case can matter for titles ("Client Review")
+    return " ".join((text or "").split())
+
+
+def prompt_version(system_prompt, few_shot_examples):
+    """Fingerprint of everything besides the user message that shapes the answer."""
+    raw = json.dumps([system_prompt, few_shot_examples], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """
+    Bounded TTL + LRU cache of parsed LLM actions, keyed by the normalized
+    prompt (after replace_natural_dates), model, today's date and prompt version.
+    """
+
+    def __init__(self, maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, prompt, model, today, version):
+        if version != self._version:
+            # Prompt or few-shot examples changed: old answers no longer apply
+            self._cache.clear()
+            self._version = version
+        return (normalize_prompt(prompt), model, today, version)
+
+    def get(self, key):
+        parsed = self._cache.get(key)
+        if parsed is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Callers fill in defaults on the dict, so never hand out the cached one
+        return copy.deepcopy(parsed)
+
+    def set(self, key, parsed):
+        self._cache[key] = copy.deepcopy(parsed)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+llm_cache = LLMResponseCache()
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+from dotenv import load_dotenv
+
+from app.log import fields
+from app.metrics import llm_responses
+
+try:
+    import h2  # noqa: F401  (httpx only speaks HTTP/2 when h2 is installed)
+except ImportError:
+    h2 = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") == "1"
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+# A Retry-After longer than this is not worth holding the user's request for
+LLM_RETRY_AFTER_MAX = float(os.getenv("LLM_RETRY_AFTER_MAX", "20"))
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class LLMAPIError(Exception):
+    def __init__(self, status_code, message, payload=None):
+        super().__init__(f"LLM API error {status_code}: {message}")
+        self.status_code = status_code
+        self.payload = payload
+
+
+def retry_after_seconds(value):
+    """Retry-After as seconds; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt):
+    # Full jitter so concurrent requests don't retry in lockstep
+    return random.uniform(0, min(LLM_RETRY_BACKOFF_MAX, LLM_RETRY_BACKOFF * 2**attempt))
+
+
+class LLMClient:
+    """OpenRouter client with one keep-alive connection pool for the app's lifetime."""
+
+    def __init__(self, base_url=OPENROUTER_BASE_URL, api_key=OPENROUTER_API_KEY):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._http = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.in_flight = 0
+
+    @property
+    def http2(self):
+        return LLM_HTTP2 and h2 is not None
+
+    def start(self):
+        if self._http is None or self._http.is_closed:
+            if LLM_HTTP2 and h2 is None and self._http is None:
+                logger.warning(
+                    "h2 is not installed; talking HTTP/1.1 to the LLM API "
+                    "(pip install 'httpx[http2]')"
+                )
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=self.http2,
+                timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def _send(self, path, payload, stream=False):
+        http = self.start()
+        self.requests += 1
+        attempt = 0
+        while True:
+            self.in_flight += 1
+            try:
+                request = http.build_request("POST", path, json=payload)
+                res = await http.send(request, stream=stream)
+            except httpx.TransportError as e:
+                # Timeouts, resets and refused connections are all worth a retry
+                res, error = None, e
+            finally:
+                self.in_flight -= 1
+            llm_responses.inc(
+                status=res.status_code if res is not None else type(error).__name__
+            )
+
+            if res is not None and res.status_code not in RETRY_STATUSES:
+                return res
+
+            delay = backoff_delay(attempt)
+            if res is not None:
+                retry_after = retry_after_seconds(res.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = retry_after
+
+            if attempt >= LLM_MAX_RETRIES or delay > LLM_RETRY_AFTER_MAX:
+                self.failures += 1
+                if res is None:
+                    raise error
+                return res
+
+            if stream:
+                await res.aclose()
+            attempt += 1
+            self.retries += 1
+            status = res.status_code if res is not None else type(error).__name__
+            logger.info(
+                "Retrying LLM request",
+                extra=fields(status=status, attempt=attempt, delay=round(delay, 2)),
+            )
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _raise_for_error(res, body):
+        if res.status_code >= 400:
+            error = body.get("error") if isinstance(body, dict) else None
+            message = error.get("message") if isinstance(error, dict) else error
+            raise LLMAPIError(res.status_code, message or res.reason_phrase, body)
+
+    async def chat_completion(self, payload):
+        res = await self._send("/chat/completions", payload)
+        try:
+            body = res.json()
+        except ValueError:
+            body = {"raw": res.text}
+        self._raise_for_error(res, body)
+        return body
+
+    async def stream_chat_completion(self, payload):
+        """
+        Yield content deltas of a streamed completion as they arrive.
+
+        Retries only happen before the first byte; once tokens are flowing a
+        dropped connection surfaces to the caller.
+        """
+        res = await self._send("/chat/completions", {**payload, "stream": True}, True)
+        try:
+            if res.status_code >= 400:
+                await res.aread()
+                try:
+                    body = res.json()
+                except ValueError:
+                    body = {"raw": res.text}
+                self._raise_for_error(res, body)
+
+            async for line in res.aiter_lines():
+                # SSE: "data: {...}" frames, ": keep-alive" comments, "data: [DONE]"
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:") :].strip()
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    self._raise_for_error(httpx.Response(502), chunk)
+                for choice in chunk.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+        finally:
+            await res.aclose()
+
+    def stats(self):
+        pool = getattr(getattr(self._http, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "open": self._http is not None and not self._http.is_closed,
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+llm_client = LLMClient()
@@ -0,0 +1,203 @@
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-logger overrides, e.g. "app.calendar_utils=DEBUG,app.chat_log=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Share of requests whose full LLM responses / events are logged (at DEBUG)
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id = contextvars.ContextVar("request_id", default=None)
+# Decided once per request so a sampled request logs all of its payloads
+payload_sampled = contextvars.ContextVar("payload_sampled", default=None)
+
+
+def fields(**values):
+    """Structured fields for a log call: logger.info("...", extra=fields(a=1))."""
+    return {"fields": values}
+
+
+def _truncate(value):
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str, ensure_ascii=False)
+    if len(value) > LOG_PAYLOAD_MAX_CHARS:
+        return f"{value[:LOG_PAYLOAD_MAX_CHARS]}... ({len(value)} chars)"
+    return value
+
+
+def log_payload(logger, message, **payloads):
+    """
+    Log large bodies at DEBUG, truncated, for a sampled share of requests
+    only. Unsampled calls return before anything is serialized.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    sampled = payload_sampled.get()
+    if sampled is None:
+        sampled = random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    if sampled:
+        logger.debug(
+            message, extra=fields(**{k: _truncate(v) for k, v in payloads.items()})
+        )
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread. Only the request context is
+    captured here; JSON encoding and the stdout write happen off the event
+    loop. When the queue is full records are dropped (and counted), never
+    waited on.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.request_id = request_id.get()
+        # Resolve what can't cross threads safely: args and live tracebacks
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class Logging:
+    """The app's log pipeline: `app.*` loggers -> queue -> JSON on stdout."""
+
+    def __init__(self, queue_size=LOG_QUEUE_SIZE):
+        self.queue = queue.Queue(queue_size)
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self._listener = None
+
+    def start(self, level=LOG_LEVEL, overrides=LOG_LEVELS, stream=None):
+        if self._listener is not None:
+            return
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JSONFormatter())
+
+        root = logging.getLogger("app")
+        root.setLevel(level)
+        root.addHandler(self.handler)
+        root.propagate = False
+        for item in filter(None, overrides.split(",")):
+            name, _, name_level = item.partition("=")
+            logging.getLogger(name.strip()).setLevel(name_level.strip().upper())
+
+        self._listener = logging.handlers.QueueListener(self.queue, output)
+        self._listener.start()
+
+    def stop(self):
+        """Flush what is queued and stop the writer thread."""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
+        logging.getLogger("app").removeHandler(self.handler)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+            "running": self._listener is not None,
+        }
+
+
+app_logging = Logging()
+access_logger = logging.getLogger("app.access")
+
+
+def _incoming_request_id(scope):
+    for name, value in scope.get("headers", []):
+        if name == REQUEST_ID_HEADER.encode():
+            value = value.decode("latin-1")
+            # Only trust ids that can't mangle a log line
+            if len(value) <= 128 and value.isprintable():
+                return value
+    return None
+
+
+class RequestContextMiddleware:
+    """
+    Gives every request a correlation id (the caller's X-Request-ID or a new
+    one), exposes it to log records and echoes it in the response headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        rid = _incoming_request_id(scope) or uuid.uuid4().hex
+        rid_token = request_id.set(rid)
+        sampled_token = payload_sampled.set(random.random() < LOG_PAYLOAD_SAMPLE_RATE)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER.encode(), rid.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            access_logger.debug(
+                "request",
+                extra=fields(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                ),
+            )
+            request_id.reset(rid_token)
+            payload_sampled.reset(sampled_token)
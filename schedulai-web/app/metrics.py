@@ -0,0 +1,233 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+from anyio import to_thread
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: from the fast-path parser (sub-ms) up to a slow LLM call
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    One metric family in the Prometheus text format.
+
+    Everything is updated from the event loop thread, so plain dict and list
+    updates are enough; there are no locks on the hot path.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines += self._samples()
+        return lines
+
+    def _samples(self):
+        return []
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def _samples(self):
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in self._series.items()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # per-bucket counts (last one is +Inf), then sum
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block took (errors included)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    """A value read at scrape time from `fn` (a number, or {label tuple: number})."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, fn, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def _samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            # A broken gauge must not take the whole scrape down
+            return []
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(v)}"
+            for key, v in value.items()
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, fn, labelnames=()):
+        return self._register(Gauge(name, documentation, fn, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+chat_stage_seconds = registry.histogram(
+    "schedulai_chat_stage_seconds",
+    "Time spent in each stage of a chat request.",
+    ["endpoint", "stage"],
+)
+action_seconds = registry.histogram(
+    "schedulai_action_seconds",
+    "Time to carry out a parsed action against the calendar.",
+    ["action"],
+)
+chat_errors = registry.counter(
+    "schedulai_chat_errors_total",
+    "Chat requests that ended in an error, by action and failing stage.",
+    ["endpoint", "action", "stage"],
+)
+calendar_request_seconds = registry.histogram(
+    "schedulai_calendar_request_seconds",
+    "Google Calendar API round trips.",
+    ["operation"],
+)
+calendar_responses = registry.counter(
+    "schedulai_calendar_responses_total",
+    "Google Calendar API responses by HTTP status (or exception name).",
+    ["operation", "status"],
+)
+llm_responses = registry.counter(
+    "schedulai_llm_responses_total",
+    "OpenRouter responses by HTTP status (or exception name), retries included.",
+    ["status"],
+)
+
+
+def _threadpool():
+    # anyio's default limiter is what run_in_threadpool / sync endpoints share
+    return to_thread.current_default_thread_limiter().statistics()
+
+
+registry.gauge(
+    "schedulai_threadpool_threads_busy",
+    "Worker threads currently running sync code.",
+    lambda: _threadpool().borrowed_tokens,
+)
+registry.gauge(
+    "schedulai_threadpool_threads_limit",
+    "Size of the worker thread pool.",
+    lambda: _threadpool().total_tokens,
+)
+registry.gauge(
+    "schedulai_threadpool_queue_depth",
+    "Calls waiting for a free worker thread.",
+    lambda: _threadpool().tasks_waiting,
+)
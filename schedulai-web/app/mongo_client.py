@@ -1,4 +1,5 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os
 
@@ -7,3 +8,8 @@ load_dotenv()
 client = MongoClient(os.getenv("MONGODB_URI")) # your mongo connection string
 db = client[""]  # ⬅️ You can name your DB anything
 chat_collection = db[""]  # Collection to store chatbot messages
+
+# Non-blocking twin of the above for code running on the event loop
+async_client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+async_db = async_client[db.name]
+async_chat_collection = async_db[chat_collection.name]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, root_validator
 from typing import List
 from datetime import datetime
 from pydantic import BaseModel, Field
@@ -12,8 +12,9 @@ class EventData(BaseModel):
     date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
     start_range: str = Field(..., pattern=r"^\d{2}:\d{2}$")
     end_range: str = Field(..., pattern=r"^\d{2}:\d{2}$")
-    duration: int
+    duration: int = Field(..., gt=0)
     participants: List[str]
+    step: Optional[int] = Field(default=None, gt=0)  # minutes between slot starts
 
     @validator("date")
     def validate_date(cls, v):
@@ -39,11 +40,46 @@ class EventData(BaseModel):
 # duration: int
 
 
+MAX_RANGE_DAYS = 31
+
+
 class FreeSlotRequest(BaseModel):
-    date: str
+    date: Optional[str] = None
+    # Range mode: every day from start_date to end_date (inclusive)
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
     start_range: Optional[str] = Field(default="08:00")
     end_range: Optional[str] = Field(default="20:00")
-    duration: Optional[int] = Field(default=60)
+    duration: Optional[int] = Field(default=60, gt=0)
+    step: Optional[int] = Field(default=None, gt=0)
+    participants: List[str] = Field(default_factory=list)
+
+    @root_validator(skip_on_failure=True)
+    def validate_dates(cls, values):
+        date, start, end = (
+            values.get("date"),
+            values.get("start_date"),
+            values.get("end_date"),
+        )
+        if start or end:
+            try:
+                first = datetime.strptime(start or date, "%Y-%m-%d")
+                last = datetime.strptime(end or start or date, "%Y-%m-%d")
+            except (TypeError, ValueError):
+                raise ValueError("Invalid date range. Expected YYYY-MM-DD")
+            if last < first:
+                raise ValueError("end_date must not be before start_date")
+            if (last - first).days >= MAX_RANGE_DAYS:
+                raise ValueError(f"Date range is limited to {MAX_RANGE_DAYS} days")
+            values["start_date"] = first.strftime("%Y-%m-%d")
+            values["end_date"] = last.strftime("%Y-%m-%d")
+        elif not date:
+            raise ValueError("Either date or start_date/end_date is required")
+        return values
+
+    @property
+    def is_range(self):
+        return bool(self.start_date and self.end_date)
 
 
 class DirectSlotBooking(BaseModel):
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+
+from app.calendar_pool import credentials_key
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class SingleFlight:
+    """
+    Concurrent identical calls share one in-flight call and its result.
+
+    Keys are (user key, operation, arguments); nothing is cached once the
+    call finishes, so this only merges requests that overlap in time.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.leaders = 0
+        self.followers = 0
+        self.forgotten = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._flights.get(key)
+        if task is not None:
+            self.followers += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._flights[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        # One caller going away must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+
+    def forget(self, user_key):
+        """Reads that start after a write must not join a flight from before it."""
+        for key in [k for k in self._flights if k[0] == user_key]:
+            del self._flights[key]
+            self.forgotten += 1
+
+    def stats(self):
+        calls = self.leaders + self.followers
+        return {
+            "in_flight": len(self._flights),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "forgotten": self.forgotten,
+            "coalescing_ratio": round(self.followers / calls, 4) if calls else 0.0,
+        }
+
+
+calendar_reads = SingleFlight()
+
+
+def coalesced(operation):
+    """Share concurrent calls of a `fn(credentials_dict, ...)` calendar read."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(credentials_dict, *args, **kwargs):
+            key = (
+                credentials_key(credentials_dict),
+                operation,
+                _freeze(args),
+                _freeze(kwargs),
+            )
+            return await calendar_reads.do(key, fn, credentials_dict, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
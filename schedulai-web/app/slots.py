@@ -0,0 +1,88 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+
+def merge_intervals(intervals):
+    """Union of (start, end) intervals, sorted, with overlapping/touching ones merged."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_gaps(busy, window_start, window_end):
+    """Yield the (start, end) gaps inside the window not covered by `busy`."""
+    cursor = window_start
+    for start, end in merge_intervals(busy):
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            yield cursor, start
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        yield cursor, window_end
+
+
+def iter_free_slots(busy, window_start, window_end, duration, step):
+    """
+    Yield (start, end) slots of length `duration` that avoid every busy interval.
+
+    Candidate starts sit on a grid of `step` anchored at `window_start`, and
+    only gaps are walked, so the cost follows the number of busy intervals
+    and slots returned rather than window size x busy count.
+    """
+    if duration <= timedelta(0):
+        # Nothing to place, and a zero step below would never advance
+        return
+    if step <= timedelta(0):
+        step = duration
+
+    for gap_start, gap_end in free_gaps(busy, window_start, window_end):
+        # First grid point at or after the gap start
+        offset = (gap_start - window_start) % step
+        slot_start = gap_start if not offset else gap_start + (step - offset)
+        while slot_start + duration <= gap_end:
+            yield slot_start, slot_start + duration
+            slot_start += step
+
+
+def overlaps_any(merged, starts, slot_start, slot_end):
+    """
+    True if [slot_start, slot_end) hits any interval in `merged`.
+
+    `merged` must come from merge_intervals() and `starts` be its start
+    times, so only the last interval starting before slot_end can overlap.
+    """
+    idx = bisect_left(starts, slot_end)
+    return idx > 0 and merged[idx - 1][1] > slot_start
+
+
+def split_by_blockers(slots, busy_by_attendee):
+    """
+    Split candidate slots into (free, blocked) given each attendee's busy set.
+
+    Blocked slots come back as (start, end, [attendees who are busy]).
+    """
+    merged = {
+        attendee: merge_intervals(busy) for attendee, busy in busy_by_attendee.items()
+    }
+    starts = {attendee: [s for s, _ in m] for attendee, m in merged.items()}
+
+    free, blocked = [], []
+    for slot_start, slot_end in slots:
+        blockers = [
+            attendee
+            for attendee, m in merged.items()
+            if overlaps_any(m, starts[attendee], slot_start, slot_end)
+        ]
+        if blockers:
+            blocked.append((slot_start, slot_end, blockers))
+        else:
+            free.append((slot_start, slot_end))
+    return free, blocked
@@ -0,0 +1,303 @@
+import contextvars
+import functools
+import importlib
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.log import request_id
+
+# "memory" (default), "file", "none", or "package.module:factory" for anything else
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "memory")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+# How many finished traces the in-memory exporter keeps for /chat/traces
+TRACE_MEMORY_SIZE = int(os.getenv("TRACE_MEMORY_SIZE", "200"))
+# Guard against a runaway loop turning one trace into megabytes
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+# Requests that start a trace (exact paths)
+TRACE_PATHS = os.getenv("TRACE_PATHS", "/chat,/chat/stream,/auth/callback").split(",")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Trace:
+    """The spans of one request, exported together once the root span ends."""
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.started_at = datetime.now(timezone.utc)
+        self.spans = []
+        self.dropped = 0
+
+    def add(self, span):
+        # Spans can finish on threadpool threads; list.append is atomic
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+    def to_dict(self):
+        """Waterfall view: spans in start order, offsets relative to the root."""
+        spans = sorted(self.spans, key=lambda s: s.t0)
+        root = next((s for s in spans if s.parent_id is None), spans[0])
+        depth = {}
+        rows = []
+        for s in spans:
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1
+            rows.append(
+                {
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "name": s.name,
+                    "depth": depth[s.span_id],
+                    "offset_ms": round((s.t0 - root.t0) * 1000, 3),
+                    "duration_ms": round(s.duration * 1000, 3),
+                    "status": s.status,
+                    "error": s.error,
+                    "attributes": s.attributes,
+                }
+            )
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_ms": round(root.duration * 1000, 3),
+            "status": root.status,
+            "dropped_spans": self.dropped,
+            "spans": rows,
+        }
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "t0",
+        "duration",
+        "status",
+        "error",
+    )
+
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.t0 = time.perf_counter()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    """Stands in when nothing is being traced, so callers never check."""
+
+    def set(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+# ---------------------------------------------------------------- exporters
+
+
+class InMemoryExporter:
+    """Keeps the most recent traces for /chat/traces; works fully offline."""
+
+    def __init__(self, maxlen=TRACE_MEMORY_SIZE):
+        self.traces = deque(maxlen=maxlen)
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+    def recent(self, limit=20, min_ms=0.0, slowest=False):
+        traces = [t.to_dict() for t in self.traces]
+        traces = [t for t in traces if t["duration_ms"] >= min_ms]
+        if slowest:
+            traces.sort(key=lambda t: t["duration_ms"], reverse=True)
+        else:
+            traces.reverse()
+        return traces[:limit]
+
+
+class FileExporter:
+    """One JSON line per trace, appended by a background thread."""
+
+    def __init__(self, path=TRACE_FILE, maxsize=1000):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def export(self, trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                f.write(json.dumps(trace.to_dict(), default=str) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+
+class NullExporter:
+    def export(self, trace):
+        pass
+
+
+def load_exporter(spec=TRACE_EXPORTER):
+    if spec == "memory":
+        return InMemoryExporter()
+    if spec == "file":
+        return FileExporter()
+    if spec == "none":
+        return NullExporter()
+    # Anything with an export(trace) method, e.g. a bridge to a collector
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+# ------------------------------------------------------------------- tracer
+
+
+class Tracer:
+    def __init__(self, exporter, sample_rate=TRACE_SAMPLE_RATE):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @contextmanager
+    def trace(self, name, trace_id=None, **attributes):
+        """Start a new trace; spans opened inside it become its children."""
+        if random.random() >= self.sample_rate:
+            # Hide any enclosing span so nothing below is recorded either
+            token = _current_span.set(None)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _current_span.reset(token)
+            return
+
+        trace = Trace(trace_id or uuid.uuid4().hex)
+        try:
+            with self._run(Span(trace, name, None, attributes)) as root:
+                yield root
+        finally:
+            self.exporter.export(trace)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """A child of the current span; free when nothing is being traced."""
+        parent = _current_span.get()
+        if parent is None:
+            yield NOOP_SPAN
+            return
+        with self._run(Span(parent.trace, name, parent.span_id, attributes)) as s:
+            yield s
+
+    @contextmanager
+    def _run(self, span):
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.t0
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # A streaming body closed from another context; nothing to restore
+                pass
+            span.trace.add(span)
+
+
+tracer = Tracer(load_exporter())
+
+
+def traced(name=None):
+    """Decorator: run each call of the function inside a span."""
+
+    def decorate(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+async def traced_threadpool(name, fn, *args, **kwargs):
+    """
+    run_in_threadpool with a span that also records how long the call sat
+    waiting for a free worker thread.
+    """
+    submitted = time.perf_counter()
+    with tracer.span(name) as s:
+
+        def call():
+            s.set("queue_wait_ms", round((time.perf_counter() - submitted) * 1000, 3))
+            return fn(*args, **kwargs)
+
+        return await run_in_threadpool(call)
+
+
+class TracingMiddleware:
+    """Makes each request to a TRACE_PATHS route a trace, streamed body included."""
+
+    def __init__(self, app, paths=TRACE_PATHS):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        # Same id as the request's log lines, so the two can be joined
+        name = f"{scope['method']} {scope['path']}"
+        with tracer.trace(name, trace_id=request_id.get()) as root:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    root.set("http.status", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -1,76 +1,142 @@
 import re
 from datetime import datetime, timedelta
 
+WEEKDAYS = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+_WEEKDAY_NAMES = "|".join(WEEKDAYS)
+
+# Every relative-date expression we rewrite, as one alternation scanned once
+NATURAL_DATE_PATTERN = re.compile(
+    r"\b(?:"
+    r"(?P<today>today)"
+    r"|(?P<tomorrow>tomorrow)"
+    r"|on (?:the )?(?P<ordinal>\d{1,2})(?:st|nd|rd|th)?"
+    rf"|next (?P<next_weekday>{_WEEKDAY_NAMES})"
+    rf"|on (?P<on_weekday>{_WEEKDAY_NAMES})"
+    r"|in (?P<in_days>\d{1,3}) days?"
+    r"|(?P<this_weekend>this weekend)"
+    r"|(?P<next_week>next week)"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def _fmt(day):
+    return day.strftime("%Y-%m-%d")
+
+
+def _ordinal_date(day, today):
+    month, year = today.month, today.year
+    # If day has passed, move to next month
+    if day < today.day:
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None  # Invalid day for the month
+
+
+def _today(m, today, ctx):
+    return _fmt(today)
+
+
+def _tomorrow(m, today, ctx):
+    return _fmt(today + timedelta(days=1))
+
+
+def _ordinal(m, today, ctx):
+    # Like the old rewriter, the first "on the Nth" decides the date for all of them
+    if ctx["ordinal"] is None:
+        return m.group(0)
+    return f"on {_fmt(ctx['ordinal'])}"
+
+
+def _next_weekday(m, today, ctx):
+    target = WEEKDAYS[m.group("next_weekday").lower()]
+    days_ahead = ((target - today.weekday() + 7) % 7) + 7
+    return _fmt(today + timedelta(days=days_ahead))
 
-def replace_natural_dates(text: str) -> str:
-    today = datetime.now()
-    tomorrow = today + timedelta(days=1)
-
-    # Replace 'today' and 'tomorrow'
-    text = re.sub(r"\btoday\b", today.strftime("%Y-%m-%d"), text, flags=re.IGNORECASE)
-    text = re.sub(
-        r"\btomorrow\b", tomorrow.strftime("%Y-%m-%d"), text, flags=re.IGNORECASE
-    )
-
-    # Handle "on the 12th", "on 13th"
-    ordinal_match = re.search(
-        r"\bon (?:the )?(\d{1,2})(st|nd|rd|th)?\b", text, flags=re.IGNORECASE
-    )
-    if ordinal_match:
-        day = int(ordinal_match.group(1))
-        month = today.month
-        year = today.year
-
-        # If day has passed, move to next month
-        if day < today.day:
-            month += 1
-            if month > 12:
-                month = 1
-                year += 1
-
-        try:
-            future_date = datetime(year, month, day)
-            text = re.sub(
-                r"\bon (?:the )?\d{1,2}(st|nd|rd|th)?\b",
-                f'on {future_date.strftime("%Y-%m-%d")}',
-                text,
-                flags=re.IGNORECASE,
-            )
-        except ValueError:
-            pass  # Invalid day for the month
-
-    # Handle weekday names like "on Monday", "next Friday"
-    weekdays = {
-        "monday": 0,
-        "tuesday": 1,
-        "wednesday": 2,
-        "thursday": 3,
-        "friday": 4,
-        "saturday": 5,
-        "sunday": 6,
-    }
 
-    for name, target_day in weekdays.items():
-        # next Friday
-        next_pattern = rf"\bnext {name}\b"
-        if re.search(next_pattern, text, flags=re.IGNORECASE):
-            days_ahead = ((target_day - today.weekday() + 7) % 7) + 7
-            date_obj = today + timedelta(days=days_ahead)
-            text = re.sub(
-                next_pattern, date_obj.strftime("%Y-%m-%d"), text, flags=re.IGNORECASE
-            )
-            continue
-
-        # on Friday
-        on_pattern = rf"\bon {name}\b"
-        if re.search(on_pattern, text, flags=re.IGNORECASE):
-            days_ahead = (target_day - today.weekday() + 7) % 7
-            if days_ahead == 0:
-                days_ahead = 7
-            date_obj = today + timedelta(days=days_ahead)
-            text = re.sub(
-                on_pattern, date_obj.strftime("%Y-%m-%d"), text, flags=re.IGNORECASE
-            )
-
-    return text
+def _on_weekday(m, today, ctx):
+    name = m.group("on_weekday").lower()
+    # "next Friday" anywhere in the message wins over "on Friday"
+    if name in ctx["next_weekdays"]:
+        return m.group(0)
+    days_ahead = (WEEKDAYS[name] - today.weekday() + 7) % 7
+    if days_ahead == 0:
+        days_ahead = 7
+    return _fmt(today + timedelta(days=days_ahead))
+
+
+def _in_days(m, today, ctx):
+    return f"on {_fmt(today + timedelta(days=int(m.group('in_days'))))}"
+
+
+def _this_weekend(m, today, ctx):
+    if today.weekday() == 6:
+        saturday = sunday = today
+    else:
+        saturday = today + timedelta(days=5 - today.weekday())
+        sunday = saturday + timedelta(days=1)
+    return f"from {_fmt(saturday)} to {_fmt(sunday)}"
+
+
+def _next_week(m, today, ctx):
+    monday = today + timedelta(days=7 - today.weekday())
+    return f"from {_fmt(monday)} to {_fmt(monday + timedelta(days=6))}"
+
+
+_REWRITERS = {
+    "today": _today,
+    "tomorrow": _tomorrow,
+    "ordinal": _ordinal,
+    "next_weekday": _next_weekday,
+    "on_weekday": _on_weekday,
+    "in_days": _in_days,
+    "this_weekend": _this_weekend,
+    "next_week": _next_week,
+}
+
+
+def replace_natural_dates(text: str, now: datetime = None, tz=None) -> str:
+    """
+    Rewrite relative dates ("tomorrow", "on the 12th", "next Friday",
+    "in 3 days", "this weekend", "next week", ...) as YYYY-MM-DD.
+
+    `now` pins the clock (tests, benchmarks); otherwise it is the current
+    time in `tz`, or server-local time when no tz is given.
+    """
+    today = now or (datetime.now(tz) if tz else datetime.now())
+
+    matches = list(NATURAL_DATE_PATTERN.finditer(text))
+    if not matches:
+        return text
+
+    first_ordinal = next((m for m in matches if m.lastgroup == "ordinal"), None)
+    ctx = {
+        "ordinal": first_ordinal
+        and _ordinal_date(int(first_ordinal.group("ordinal")), today),
+        "next_weekdays": {
+            m.group("next_weekday").lower()
+            for m in matches
+            if m.lastgroup == "next_weekday"
+        },
+    }
 
+    out, pos = [], 0
+    for m in matches:
+        out.append(text[pos : m.start()])
+        out.append(_REWRITERS[m.lastgroup](m, today, ctx))
+        pos = m.end()
+    out.append(text[pos:])
+    return "".join(out)
@@ -0,0 +1,53 @@
+"""
+Per-message cost of replace_natural_dates, old multi-pass version vs the
+current single-pass one, over the prompts in date_prompts.txt.
+
+    python benchmarks/bench_dates.py [--repeat 5] [--number 200]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import legacy_dates  # noqa: E402
+from app.utils import replace_natural_dates  # noqa: E402
+from check_dates import load_corpus  # noqa: E402
+
+
+def per_message_us(fn, prompts, repeat, number):
+    def run():
+        for prompt in prompts:
+            fn(prompt)
+
+    best = min(timeit.repeat(run, repeat=repeat, number=number))
+    return best / (number * len(prompts)) * 1e6
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--number", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    prompts = load_corpus()
+    now = datetime(2025, 7, 14, 9, 30)
+    old = per_message_us(
+        legacy_dates.replace_natural_dates, prompts, args.repeat, args.number
+    )
+    new = per_message_us(
+        lambda text: replace_natural_dates(text, now=now),
+        prompts,
+        args.repeat,
+        args.number,
+    )
+    print(f"{len(prompts)} prompts, best of {args.repeat} x {args.number} runs")
+    print(f"legacy      {old:8.2f} µs/message")
+    print(f"single-pass {new:8.2f} µs/message  ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
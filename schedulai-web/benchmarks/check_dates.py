@@ -0,0 +1,63 @@
+"""
+Equivalence check: the single-pass replace_natural_dates must rewrite
+every prompt in date_prompts.txt exactly like the old multi-pass version
+(benchmarks/legacy_dates.py), for every day of a year of pinned clocks.
+
+    python benchmarks/check_dates.py
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import replace_natural_dates  # noqa: E402
+import legacy_dates  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "date_prompts.txt")
+
+
+def load_corpus(path=CORPUS):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\r\n") for line in f if line.strip()]
+
+
+def pinned_legacy(text, now):
+    """Run the old function with datetime.now() frozen at `now`."""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+
+    original = legacy_dates.datetime
+    legacy_dates.datetime = FrozenDatetime
+    try:
+        return legacy_dates.replace_natural_dates(text)
+    finally:
+        legacy_dates.datetime = original
+
+
+def main():
+    prompts = load_corpus()
+    start = datetime(2025, 1, 1, 9, 30)
+    mismatches = 0
+    for offset in range(366):
+        now = start + timedelta(days=offset)
+        for prompt in prompts:
+            expected = pinned_legacy(prompt, now)
+            actual = replace_natural_dates(prompt, now=now)
+            if actual != expected:
+                mismatches += 1
+                print(
+                    f"❌ {now:%Y-%m-%d} {prompt!r}\n   old: {expected!r}\n   new: {actual!r}"
+                )
+
+    checked = 366 * len(prompts)
+    print(f"{checked - mismatches}/{checked} rewrites identical")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Offline microbenchmarks for the CPU-bound request paths.
+
+Writes per-call timings as JSON and, given a baseline, prints the
+before/after change for every case.
+
+    python benchmarks/run_benchmarks.py                    # run, write results/latest.json
+    python benchmarks/run_benchmarks.py --compare          # ... and diff against baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline    # make this run the new baseline
+    python benchmarks/run_benchmarks.py -k slots           # only cases whose name contains "slots"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import pytz  # noqa: E402
+
+from app import calendar_utils  # noqa: E402
+from app.json_extract import extract_first_json  # noqa: E402
+from app.schemas import EventData, FreeSlotRequest  # noqa: E402
+from app.utils import replace_natural_dates  # noqa: E402
+from check_dates import load_corpus  # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+LATEST = os.path.join(HERE, "results", "latest.json")
+
+BENCH_DATE = "2030-01-15"  # far from "today", so no same-day window trimming
+LOCAL_TZ = pytz.timezone("Asia/Dubai")
+CREDENTIALS = {"token": "bench", "refresh_token": "bench", "client_id": "bench"}
+
+
+# ---------------------------------------------------------------- fixtures
+
+
+def busy_intervals(count, window_start="08:00", window_end="20:00"):
+    """`count` 20-minute busy blocks spread evenly (overlapping when dense)."""
+    day = datetime.strptime(f"{BENCH_DATE} {window_start}", "%Y-%m-%d %H:%M")
+    end = datetime.strptime(f"{BENCH_DATE} {window_end}", "%Y-%m-%d %H:%M")
+    span = (end - day).total_seconds()
+    blocks = []
+    for i in range(count):
+        start = day + timedelta(seconds=span * i / max(count, 1))
+        blocks.append(
+            {
+                "start": start.strftime("%Y-%m-%dT%H:%M:%S+04:00"),
+                "end": (start + timedelta(minutes=20)).strftime(
+                    "%Y-%m-%dT%H:%M:%S+04:00"
+                ),
+            }
+        )
+    return blocks
+
+
+class CannedFreeBusyClient:
+    """Stands in for CalendarClient: freebusy answers from memory."""
+
+    def __init__(self, busy):
+        self.busy = busy
+
+    async def freebusy(self, time_min, time_max, calendar_ids, time_zone):
+        return {calendar_id: {"busy": self.busy} for calendar_id in calendar_ids}
+
+
+def slots_case(busy_count, start_range, end_range, duration=30, step=15):
+    client = CannedFreeBusyClient(busy_intervals(busy_count, start_range, end_range))
+    loop = asyncio.new_event_loop()
+
+    def run():
+        original = calendar_utils.calendar_client
+        calendar_utils.calendar_client = lambda *a, **k: client
+        try:
+            return loop.run_until_complete(
+                calendar_utils.get_all_free_slots(
+                    CREDENTIALS, BENCH_DATE, start_range, end_range, duration, step
+                )
+            )
+        finally:
+            calendar_utils.calendar_client = original
+
+    return run
+
+
+def dates_case():
+    prompts = load_corpus()
+    now = datetime(2025, 7, 14, 9, 30)
+
+    def run():
+        for prompt in prompts:
+            replace_natural_dates(prompt, now=now)
+
+    return run, len(prompts)
+
+
+def extract_case(text):
+    return lambda: extract_first_json(text)
+
+
+LLM_CLEAN = '{"action": "create", "title": "Design Review", "date": "2025-07-20", "start_range": "15:00", "end_range": "16:00", "participants": ["a@x.com"]}'
+LLM_CHATTY = (
+    "Sure! Here is the action for your request:\n\n```json\n"
+    + LLM_CLEAN.replace("Design Review", 'Review {draft} \\"v2\\"')
+    + "\n```\n\nNote: I assumed you meant the afternoon. "
+    + "Let me know if you'd like a different time. " * 20
+)
+
+
+def cases():
+    """name -> (callable, items per call) — timings are reported per item."""
+    table = {}
+    for busy in (0, 10, 100, 1000):
+        table[f"slots.full_day.busy_{busy}"] = (slots_case(busy, "08:00", "20:00"), 1)
+        table[f"slots.morning.busy_{busy}"] = (slots_case(busy, "09:00", "12:00"), 1)
+    table["slots.full_day.step_5.busy_100"] = (
+        slots_case(100, "08:00", "20:00", step=5),
+        1,
+    )
+    table["dates.replace_natural_dates"] = dates_case()
+    table["json.extract_first_json.clean"] = (extract_case(LLM_CLEAN), 1)
+    table["json.extract_first_json.chatty"] = (extract_case(LLM_CHATTY), 1)
+    table["time.ensure_aware.offset"] = (
+        lambda: calendar_utils.ensure_aware("2025-07-20T15:00:00+04:00", LOCAL_TZ),
+        1,
+    )
+    table["time.ensure_aware.utc_z"] = (
+        lambda: calendar_utils.ensure_aware("2025-07-20T11:00:00Z", LOCAL_TZ),
+        1,
+    )
+    event = json.loads(LLM_CLEAN)
+    event["duration"] = 60
+    table["schemas.EventData"] = (lambda: EventData(**event), 1)
+    table["schemas.FreeSlotRequest.day"] = (
+        lambda: FreeSlotRequest(date="2025-07-20", start_range="10:00"),
+        1,
+    )
+    table["schemas.FreeSlotRequest.range"] = (
+        lambda: FreeSlotRequest(start_date="2025-07-20", end_date="2025-07-26"),
+        1,
+    )
+    return table
+
+
+# ----------------------------------------------------------------- running
+
+
+def measure(fn, items, repeat, min_time):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s; scale up to the requested minimum per repeat
+    number = max(1, int(number * min_time / 0.2))
+    runs = [
+        t / number / items * 1e6 for t in timer.repeat(repeat=repeat, number=number)
+    ]
+    return {
+        "best_us": round(min(runs), 3),
+        "median_us": round(statistics.median(runs), 3),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_all(selected, repeat, min_time):
+    results = {}
+    for name, (fn, items) in cases().items():
+        if selected and not any(k in name for k in selected):
+            continue
+        results[name] = measure(fn, items, repeat, min_time)
+        print(f"{name:40s} {results[name]['best_us']:12.3f} µs")
+    return {
+        "meta": {
+            "created": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print per-case change vs the baseline; returns the names that got slower."""
+    regressions = []
+    print(f"\n{'case':40s} {'baseline µs':>12s} {'current µs':>12s} {'change':>8s}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:40s} {'-':>12s} {result['best_us']:12.3f}      new")
+            continue
+        change = (result["best_us"] - before["best_us"]) / before["best_us"] * 100
+        flag = ""
+        if change > threshold:
+            flag = "  ⚠️ slower"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  ✅ faster"
+        print(
+            f"{name:40s} {before['best_us']:12.3f} {result['best_us']:12.3f} "
+            f"{change:+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("-k", action="append", default=[], help="name filter")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per repeat"
+    )
+    arg_parser.add_argument("--output", default=LATEST)
+    arg_parser.add_argument("--baseline", default=BASELINE)
+    arg_parser.add_argument("--compare", action="store_true")
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    arg_parser.add_argument(
+        "--threshold", type=float, default=10.0, help="percent change worth flagging"
+    )
+    args = arg_parser.parse_args()
+
+    started = time.perf_counter()
+    current = run_all(args.k, args.repeat, args.min_time)
+    write_json(args.output, current)
+    print(f"\n📝 Wrote {args.output} ({time.perf_counter() - started:.1f}s)")
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline first")
+        else:
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+            status = 1 if compare(current, baseline, args.threshold) else 0
+
+    if args.save_baseline:
+        write_json(args.baseline, current)
+        print(f"📌 Saved baseline {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+In-memory stand-in for the parts of Google Calendar v3 the app uses:
+freeBusy, events list (with syncToken), get/insert/update/patch/delete,
+the multipart batch endpoint, watch channels and the OAuth token refresh.
+Registered channels (token included) are listed at GET /_channels, for
+tools/fake_calendar_push.py.
+
+    python loadtest/fake_calendar.py --port 8101 --latency-ms 40
+
+Point the app at it with
+    GOOGLE_CALENDAR_API_BASE=http://127.0.0.1:8101/calendar/v3
+    GOOGLE_CALENDAR_BATCH_URL=http://127.0.0.1:8101/batch/calendar/v3
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from dateutil import parser
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+LOCAL_OFFSET = "+04:00"
+
+
+class CalendarState:
+    """Events for the primary calendar, plus a change log for syncTokens."""
+
+    def __init__(self):
+        self.events = {}
+        self._seq = itertools.count(1)
+        self.seq = 0
+        self.channels = {}
+        self.resource_id = uuid.uuid4().hex
+
+    def _touch(self, event):
+        self.seq = next(self._seq)
+        event["_seq"] = self.seq
+        event["etag"] = f'"{self.seq}"'
+        event["updated"] = datetime.utcnow().isoformat() + "Z"
+        return event
+
+    def insert(self, body):
+        event = {
+            **body,
+            "id": uuid.uuid4().hex,
+            "status": "confirmed",
+            "kind": "calendar#event",
+        }
+        self.events[event["id"]] = self._touch(event)
+        return event
+
+    def update(self, event_id, body, partial):
+        event = self.events.get(event_id)
+        if not event or event["status"] == "cancelled":
+            return None
+        merged = merge_patch(event, body) if partial else {**body, "id": event_id}
+        merged["status"] = "confirmed"
+        self.events[event_id] = self._touch(merged)
+        return merged
+
+    def delete(self, event_id):
+        event = self.events.get(event_id)
+        if not event or event["status"] == "cancelled":
+            return False
+        event["status"] = "cancelled"
+        self._touch(event)
+        return True
+
+    def live(self):
+        return [e for e in self.events.values() if e["status"] != "cancelled"]
+
+    def seed(self, days, per_day, start_date):
+        """`per_day` one-hour events from 10:00 on each of `days` days."""
+        first = datetime.strptime(start_date, "%Y-%m-%d")
+        for d in range(days):
+            day = first + timedelta(days=d)
+            for i in range(per_day):
+                start = day.replace(hour=10 + i)
+                self.insert(
+                    {
+                        "summary": f"Seeded {i}",
+                        "start": {"dateTime": start.isoformat() + LOCAL_OFFSET},
+                        "end": {
+                            "dateTime": (start + timedelta(hours=1)).isoformat()
+                            + LOCAL_OFFSET
+                        },
+                    }
+                )
+
+
+def merge_patch(event, body):
+    """Google's PATCH semantics: nested objects merge, everything else replaces."""
+    merged = dict(event)
+    for key, value in body.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_patch(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def public(event):
+    return {k: v for k, v in event.items() if not k.startswith("_")}
+
+
+def bounds(event):
+    return (
+        parser.isoparse(event["start"]["dateTime"]),
+        parser.isoparse(event["end"]["dateTime"]),
+    )
+
+
+def create_app(latency_ms=0.0, jitter_ms=0.0, state=None):
+    app = FastAPI()
+    app.state.calendar = state or CalendarState()
+    app.state.requests = 0
+
+    @app.middleware("http")
+    async def simulated_latency(request, call_next):
+        app.state.requests += 1
+        if latency_ms or jitter_ms:
+            delay = max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000
+            await asyncio.sleep(delay)
+        return await call_next(request)
+
+    def cal():
+        return app.state.calendar
+
+    @app.post("/token")
+    async def token():
+        return {"access_token": uuid.uuid4().hex, "expires_in": 3600}
+
+    @app.post("/calendar/v3/freeBusy")
+    async def freebusy(request: Request):
+        body = await request.json()
+        time_min = parser.isoparse(body["timeMin"])
+        time_max = parser.isoparse(body["timeMax"])
+        busy = []
+        for event in cal().live():
+            start, end = bounds(event)
+            if start < time_max and end > time_min:
+                busy.append(
+                    {
+                        "start": event["start"]["dateTime"],
+                        "end": event["end"]["dateTime"],
+                    }
+                )
+        calendars = {}
+        for item in body.get("items", []):
+            # Only the user's own calendar has events here; others are free
+            calendars[item["id"]] = {"busy": busy if item["id"] == "primary" else []}
+        return {"kind": "calendar#freeBusy", "calendars": calendars}
+
+    @app.get("/calendar/v3/calendars/{calendar_id}/events")
+    async def list_events(
+        calendar_id: str,
+        syncToken: str = None,
+        timeMin: str = None,
+        timeMax: str = None,
+    ):
+        if syncToken:
+            since = int(syncToken)
+            items = [e for e in cal().events.values() if e["_seq"] > since]
+        else:
+            items = cal().live()
+            if timeMin:
+                lo = parser.isoparse(timeMin)
+                items = [e for e in items if bounds(e)[1] > lo]
+            if timeMax:
+                hi = parser.isoparse(timeMax)
+                items = [e for e in items if bounds(e)[0] < hi]
+        return {
+            "kind": "calendar#events",
+            "items": [public(e) for e in items],
+            "nextSyncToken": str(cal().seq),
+        }
+
+    @app.post("/calendar/v3/calendars/{calendar_id}/events")
+    async def insert_event(calendar_id: str, request: Request):
+        return public(cal().insert(await request.json()))
+
+    def not_found():
+        return JSONResponse({"error": {"code": 404, "message": "Not Found"}}, 404)
+
+    @app.get("/calendar/v3/calendars/{calendar_id}/events/{event_id}")
+    async def get_event(calendar_id: str, event_id: str):
+        event = cal().events.get(event_id)
+        if not event or event["status"] == "cancelled":
+            return not_found()
+        return public(event)
+
+    async def _write(event_id, request, partial):
+        current = cal().events.get(event_id)
+        if_match = request.headers.get("if-match")
+        if current and if_match and if_match != current["etag"]:
+            return JSONResponse(
+                {"error": {"code": 412, "message": "Precondition Failed"}}, 412
+            )
+        event = cal().update(event_id, await request.json(), partial)
+        if event is None:
+            return not_found()
+        mask = request.query_params.get("fields")
+        if mask:
+            # Top-level partial response is all the app asks for
+            keep = set(mask.split(","))
+            return {k: v for k, v in public(event).items() if k in keep}
+        return public(event)
+
+    @app.put("/calendar/v3/calendars/{calendar_id}/events/{event_id}")
+    async def update_event(calendar_id: str, event_id: str, request: Request):
+        return await _write(event_id, request, partial=False)
+
+    @app.patch("/calendar/v3/calendars/{calendar_id}/events/{event_id}")
+    async def patch_event(calendar_id: str, event_id: str, request: Request):
+        return await _write(event_id, request, partial=True)
+
+    @app.delete("/calendar/v3/calendars/{calendar_id}/events/{event_id}")
+    async def delete_event(calendar_id: str, event_id: str):
+        if not cal().delete(event_id):
+            return JSONResponse({"error": {"code": 410, "message": "Deleted"}}, 410)
+        return Response(status_code=204)
+
+    @app.post("/calendar/v3/calendars/{calendar_id}/events/watch")
+    async def watch_events(calendar_id: str, request: Request):
+        body = await request.json()
+        ttl = int(body.get("params", {}).get("ttl", 604800))
+        channel = {
+            "kind": "api#channel",
+            "id": body["id"],
+            "resourceId": cal().resource_id,
+            "resourceUri": f"{request.base_url}calendar/v3/calendars/{calendar_id}/events",
+            "token": body.get("token"),
+            "address": body["address"],
+            "expiration": str(int((time.time() + ttl) * 1000)),
+        }
+        cal().channels[channel["id"]] = channel
+        return {k: v for k, v in channel.items() if k != "address"}
+
+    @app.post("/calendar/v3/channels/stop")
+    async def stop_channel(request: Request):
+        body = await request.json()
+        if cal().channels.pop(body["id"], None) is None:
+            return not_found()
+        return Response(status_code=204)
+
+    @app.post("/batch/calendar/v3")
+    async def batch(request: Request):
+        boundary = re.search(r"boundary=([^;]+)", request.headers["content-type"])
+        boundary = boundary.group(1).strip('"')
+        text = (await request.body()).decode().replace("\r\n", "\n")
+
+        out_boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in text.split(f"--{boundary}")[1:]:
+            if part.startswith("--"):
+                break
+            headers, _, inner = part.strip("\n").partition("\n\n")
+            content_id = re.search(r"Content-ID: <([^>]+)>", headers).group(1)
+            request_line = inner.split("\n", 1)[0]
+            method, path, _ = request_line.split(" ")
+            event_id = path.rstrip("/").rsplit("/", 1)[-1]
+
+            if method == "DELETE" and cal().delete(event_id):
+                status, payload = "204 No Content", ""
+            else:
+                status = "404 Not Found"
+                payload = json.dumps({"error": {"code": 404, "message": "Not Found"}})
+            parts.append(
+                f"--{out_boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n"
+                f"{payload}\r\n"
+            )
+        body = "".join(parts) + f"--{out_boundary}--\r\n"
+        return Response(body, media_type=f"multipart/mixed; boundary={out_boundary}")
+
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": app.state.requests, "events": len(cal().live())}
+
+    @app.get("/_channels")
+    async def channels():
+        # Oldest first; what a real Google would push to, tokens included
+        return {"channels": list(cal().channels.values())}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--port", type=int, default=8101)
+    arg_parser.add_argument("--latency-ms", type=float, default=40)
+    arg_parser.add_argument("--jitter-ms", type=float, default=10)
+    arg_parser.add_argument("--seed-days", type=int, default=14)
+    arg_parser.add_argument("--seed-per-day", type=int, default=3)
+    arg_parser.add_argument("--seed-start", default="2030-01-01")
+    args = arg_parser.parse_args()
+
+    state = CalendarState()
+    state.seed(args.seed_days, args.seed_per_day, args.seed_start)
+    app = create_app(args.latency_ms, args.jitter_ms, state)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Stand-in for OpenRouter's /chat/completions with configurable latency.
+
+Answers the load driver's message templates with canned action JSON
+(anything else gets a polite non-answer), plain or as an SSE stream.
+
+    python loadtest/fake_openrouter.py --port 8102 --latency-ms 800
+
+Point the app at it with OPENROUTER_BASE_URL=http://127.0.0.1:8102/api/v1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+DATE = r"(?P<date>\d{4}-\d{2}-\d{2})"
+
+# The driver's templates are deliberately chatty so the fast-path parser
+# passes on them and every request really goes through the "LLM"
+CANNED = [
+    (
+        re.compile(rf"book '(?P<title>[^']+)' on {DATE} somewhere between"),
+        lambda m: {
+            "action": "create",
+            "title": m["title"],
+            "date": m["date"],
+            "start_range": "09:00",
+            "end_range": "17:00",
+            "duration": 30,
+            "participants": [],
+        },
+    ),
+    (
+        re.compile(rf"check what is free on {DATE}"),
+        lambda m: {
+            "action": "check",
+            "date": m["date"],
+            "start_range": "09:00",
+            "end_range": "17:00",
+            "duration": 30,
+        },
+    ),
+    (
+        re.compile(rf"cancel whatever is on {DATE} at (?P<time>\d{{2}}:\d{{2}})"),
+        lambda m: {
+            "action": "delete",
+            "start_time": f"{m['date']}T{m['time']}:00",
+        },
+    ),
+    (
+        re.compile(
+            rf"push the (?P<old>\d{{2}}:\d{{2}}) on {DATE} to (?P<new>\d{{2}}):(?P<min>\d{{2}})"
+        ),
+        lambda m: {
+            "action": "update",
+            "original_event": {"start_time": f"{m['date']}T{m['old']}:00+04:00"},
+            "updated_fields": {
+                "start_time": f"{m['date']}T{m['new']}:{m['min']}:00+04:00",
+                "end_time": f"{m['date']}T{int(m['new']) + 1:02d}:{m['min']}:00+04:00",
+            },
+        },
+    ),
+]
+
+FALLBACK = "Sorry, I can only help with calendar requests."
+
+
+def canned_reply(prompt):
+    for pattern, build in CANNED:
+        match = pattern.search(prompt)
+        if match:
+            return json.dumps(build(match))
+    return FALLBACK
+
+
+def chunks(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+def create_app(latency_ms=0.0, jitter_ms=0.0, chunk_chars=12, token_ms=5.0):
+    app = FastAPI()
+    app.state.requests = 0
+
+    async def think():
+        if latency_ms or jitter_ms:
+            await asyncio.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+
+    @app.post("/api/v1/chat/completions")
+    async def completions(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+        reply = canned_reply(prompt)
+        completion_id = f"gen-{uuid.uuid4().hex}"
+
+        if not body.get("stream"):
+            await think()
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+
+        async def events():
+            # Latency is time-to-first-token; the rest trickles in per chunk
+            yield ": OPENROUTER PROCESSING\n\n"
+            await think()
+            for piece in chunks(reply, chunk_chars):
+                frame = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {"content": piece}}],
+                }
+                yield f"data: {json.dumps(frame)}\n\n"
+                if token_ms:
+                    await asyncio.sleep(token_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/_stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--port", type=int, default=8102)
+    arg_parser.add_argument("--latency-ms", type=float, default=800)
+    arg_parser.add_argument("--jitter-ms", type=float, default=200)
+    arg_parser.add_argument("--chunk-chars", type=int, default=12)
+    arg_parser.add_argument("--token-ms", type=float, default=5)
+    args = arg_parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.chunk_chars, args.token_ms)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+End-to-end load test for /chat against local fake Calendar and OpenRouter.
+
+Starts both fakes in-process, runs the app (`uvicorn main:app`) pointed at
+them, fires a mix of create/check/delete/update messages at a fixed
+concurrency and reports throughput plus p50/p95/p99 latency per action.
+
+    python loadtest/run.py --concurrency 20 --requests 400
+    python loadtest/run.py --endpoint chat/stream --llm-latency-ms 1500
+    python loadtest/run.py --app-url http://127.0.0.1:8000   # app already running
+
+The app still needs its Mongo (credentials, chat logs). Its demo_user must
+have credentials whose token_uri is the fake /token; --seed-credentials
+writes such a set, replacing whatever demo_user had.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+import uvicorn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+sys.path.insert(0, HERE)
+
+import fake_calendar  # noqa: E402
+import fake_openrouter  # noqa: E402
+
+USER_ID = "demo_user"
+SEED_START = "2030-01-01"  # well clear of "today", so no same-day trimming
+
+TEMPLATES = {
+    "create": "could you please book 'Load {n}' on {date} somewhere between 09:00 and 17:00 for 30 minutes",
+    "check": "could you please check what is free on {date} between 09:00 and 17:00 ({n})",
+    "delete": "could you please cancel whatever is on {date} at 10:00 ({n})",
+    "update": "could you please push the 11:00 on {date} to 15:00 ({n})",
+}
+
+
+# ------------------------------------------------------------------ servers
+
+
+class ThreadedServer:
+    """A uvicorn server on a background thread (for the fakes)."""
+
+    def __init__(self, app, port):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("fake server failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def spawn_app(port, calendar_url, llm_url):
+    env = {
+        **os.environ,
+        "GOOGLE_CALENDAR_API_BASE": f"{calendar_url}/calendar/v3",
+        "GOOGLE_CALENDAR_BATCH_URL": f"{calendar_url}/batch/calendar/v3",
+        "OPENROUTER_BASE_URL": f"{llm_url}/api/v1",
+        "OPENROUTER_API_KEY": os.getenv("OPENROUTER_API_KEY", "loadtest"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        # The app prints a lot per request; keep it out of the report
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url, process=None, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"app exited with code {process.returncode}")
+        try:
+            httpx.get(f"{url}/chat/llm/stats", timeout=1).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"app at {url} not ready after {timeout}s")
+
+
+async def seed_credentials(calendar_url):
+    sys.path.insert(0, ROOT)
+    from app.credential_store import credential_store
+
+    await credential_store.save(
+        USER_ID,
+        {
+            "token": "loadtest",
+            "refresh_token": "loadtest",
+            "token_uri": f"{calendar_url}/token",
+            "client_id": "loadtest",
+            "client_secret": "loadtest",
+            "scopes": ["https://www.googleapis.com/auth/calendar"],
+        },
+    )
+
+
+# ------------------------------------------------------------------ workload
+
+
+def parse_mix(mix):
+    """Weights from "create=4,check=4,delete=1,update=1"."""
+    weights = {}
+    for item in mix.split(","):
+        action, _, weight = item.partition("=")
+        action = action.strip()
+        if action not in TEMPLATES:
+            raise SystemExit(f"unknown action in --mix: {action}")
+        weights[action] = float(weight or 1)
+    return weights
+
+
+def build_workload(count, weights, days, seed):
+    rng = random.Random(seed)
+    first = datetime.strptime(SEED_START, "%Y-%m-%d")
+    actions = rng.choices(list(weights), weights=list(weights.values()), k=count)
+    work = []
+    for n, action in enumerate(actions):
+        date = (first + timedelta(days=rng.randrange(days))).strftime("%Y-%m-%d")
+        work.append((action, TEMPLATES[action].format(n=n, date=date)))
+    return work
+
+
+def is_error(status, body):
+    """Same test as app.chat.is_error_result, plus HTTP failures."""
+    if status >= 400:
+        return True
+    # /chat answers null when an action raised inside dispatch_action
+    if not isinstance(body, dict):
+        return True
+    return "error" in body or str(body.get("response", "")).startswith("❌")
+
+
+async def call_chat(client, path, message):
+    started = time.perf_counter()
+    res = await client.post(path, json={"message": message, "session_id": "loadtest"})
+    elapsed = time.perf_counter() - started
+    try:
+        body = res.json()
+    except ValueError:
+        body = None
+    return elapsed, None, is_error(res.status_code, body)
+
+
+async def call_stream(client, path, message):
+    started = time.perf_counter()
+    ttfb, failed, event = None, False, None
+    async with client.stream(
+        "POST", path, json={"message": message, "session_id": "loadtest"}
+    ) as res:
+        failed = res.status_code >= 400
+        async for line in res.aiter_lines():
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+            elif line.startswith("data:") and event in ("error", "result"):
+                data = json.loads(line[len("data:") :])
+                failed = failed or event == "error" or is_error(200, data)
+    return time.perf_counter() - started, ttfb, failed
+
+
+async def drive(app_url, endpoint, work, concurrency, timeout):
+    call = call_stream if endpoint == "chat/stream" else call_chat
+    samples = defaultdict(list)  # action -> [(latency, ttfb, failed)]
+    queue = asyncio.Queue()
+    for item in work:
+        queue.put_nowait(item)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=app_url, timeout=timeout, limits=limits
+    ) as client:
+
+        async def worker():
+            while not queue.empty():
+                action, message = queue.get_nowait()
+                try:
+                    samples[action].append(await call(client, f"/{endpoint}", message))
+                except httpx.HTTPError:
+                    samples[action].append((None, None, True))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+    return samples, wall
+
+
+# ------------------------------------------------------------------ report
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(rows, wall):
+    latencies = sorted(r[0] for r in rows if r[0] is not None)
+    ttfbs = sorted(r[1] for r in rows if r[1] is not None)
+    summary = {
+        "requests": len(rows),
+        "errors": sum(1 for r in rows if r[2]),
+        "throughput_rps": round(len(rows) / wall, 2) if wall else 0.0,
+    }
+    for p in (50, 95, 99):
+        value = percentile(latencies, p)
+        summary[f"p{p}_ms"] = round(value * 1000, 1) if value is not None else None
+    if ttfbs:
+        for p in (50, 95, 99):
+            summary[f"ttfb_p{p}_ms"] = round(percentile(ttfbs, p) * 1000, 1)
+    return summary
+
+
+def report(samples, wall):
+    table = {action: summarize(rows, wall) for action, rows in sorted(samples.items())}
+    table["all"] = summarize([r for rows in samples.values() for r in rows], wall)
+
+    with_ttfb = any("ttfb_p50_ms" in s for s in table.values())
+    header = f"{'action':8s} {'reqs':>6s} {'errs':>5s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}"
+    if with_ttfb:
+        header += f" {'ttfb p50':>9s} {'ttfb p95':>9s}"
+    print("\n" + header)
+    for action, s in table.items():
+        cells = [s["p50_ms"], s["p95_ms"], s["p99_ms"]]
+        if with_ttfb:
+            cells += [s.get("ttfb_p50_ms"), s.get("ttfb_p95_ms")]
+        line = f"{action:8s} {s['requests']:6d} {s['errors']:5d} {s['throughput_rps']:8.2f}"
+        line += "".join(f" {'-' if c is None else c:>9}" for c in cells)
+        print(line)
+    print(f"\n⏱️ {table['all']['requests']} requests in {wall:.2f}s")
+    return table
+
+
+# ------------------------------------------------------------------ main
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument(
+        "--app-url", help="use a running app instead of spawning one"
+    )
+    arg_parser.add_argument("--app-port", type=int, default=8100)
+    arg_parser.add_argument("--calendar-port", type=int, default=8101)
+    arg_parser.add_argument("--llm-port", type=int, default=8102)
+    arg_parser.add_argument(
+        "--endpoint", choices=["chat", "chat/stream"], default="chat"
+    )
+    arg_parser.add_argument("--concurrency", type=int, default=20)
+    arg_parser.add_argument("--requests", type=int, default=400)
+    arg_parser.add_argument(
+        "--mix", default="create=4,check=4,delete=1,update=1", help="action=weight,..."
+    )
+    arg_parser.add_argument("--days", type=int, default=14, help="dates to spread over")
+    arg_parser.add_argument("--seed-per-day", type=int, default=3)
+    arg_parser.add_argument("--calendar-latency-ms", type=float, default=40)
+    arg_parser.add_argument("--calendar-jitter-ms", type=float, default=10)
+    arg_parser.add_argument("--llm-latency-ms", type=float, default=800)
+    arg_parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    arg_parser.add_argument("--timeout", type=float, default=60)
+    arg_parser.add_argument("--seed", type=int, default=0, help="workload RNG seed")
+    arg_parser.add_argument("--seed-credentials", action="store_true")
+    arg_parser.add_argument("--json", help="also write the report here")
+    args = arg_parser.parse_args()
+
+    calendar_url = f"http://127.0.0.1:{args.calendar_port}"
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+
+    state = fake_calendar.CalendarState()
+    state.seed(args.days, args.seed_per_day, SEED_START)
+    servers = [
+        ThreadedServer(
+            fake_calendar.create_app(
+                args.calendar_latency_ms, args.calendar_jitter_ms, state
+            ),
+            args.calendar_port,
+        ),
+        ThreadedServer(
+            fake_openrouter.create_app(args.llm_latency_ms, args.llm_jitter_ms),
+            args.llm_port,
+        ),
+    ]
+    for server in servers:
+        server.start()
+    print(f"🧪 Fake Calendar on {calendar_url}, fake OpenRouter on {llm_url}")
+
+    if args.seed_credentials:
+        print(f"⚠️ Overwriting {USER_ID}'s stored credentials with fake ones")
+        asyncio.run(seed_credentials(calendar_url))
+
+    app_process = None
+    app_url = args.app_url
+    if not app_url:
+        app_url = f"http://127.0.0.1:{args.app_port}"
+        app_process = spawn_app(args.app_port, calendar_url, llm_url)
+    try:
+        wait_ready(app_url, app_process)
+        work = build_workload(args.requests, parse_mix(args.mix), args.days, args.seed)
+        print(
+            f"🚀 {len(work)} requests to /{args.endpoint} at concurrency {args.concurrency}"
+        )
+        samples, wall = asyncio.run(
+            drive(app_url, args.endpoint, work, args.concurrency, args.timeout)
+        )
+        table = report(samples, wall)
+        upstream = {
+            "calendar_requests": httpx.get(f"{calendar_url}/_stats").json()["requests"],
+            "llm_requests": httpx.get(f"{llm_url}/_stats").json()["requests"],
+        }
+        print(
+            f"📡 Upstream calls: {upstream['calendar_requests']} Calendar, "
+            f"{upstream['llm_requests']} OpenRouter"
+        )
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=10)
+        for server in servers:
+            server.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "args": vars(args),
+                    "wall_s": round(wall, 3),
+                    "upstream": upstream,
+                    "actions": table,
+                },
+                f,
+                indent=2,
+            )
+        print(f"📝 Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
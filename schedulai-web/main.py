@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -6,12 +6,53 @@ from fastapi.templating import Jinja2Templates
 from app.auth import router as auth_router
 from app.chat import router as chat_router
 from models import ChatMessage
-from app.mongo_client import chat_collection
 from fastapi.middleware.cors import CORSMiddleware
+from app.calendar_client import close_http_client
+from app.llm_client import llm_client
+from app.chat_log import chat_log
+from app.credential_store import credential_store
+from app.calendar_watch import channel_registry
+from app import chat_history
+from app.log import app_logging, fields, RequestContextMiddleware
+from app.tracing import TracingMiddleware
+from typing import Optional
+from contextlib import asynccontextmanager
 
+import logging
 import os
 
-app = FastAPI()
+logger = logging.getLogger("app.main")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # JSON logs are written by a background thread, never on the event loop
+    app_logging.start()
+    # One OpenRouter connection pool for the app's lifetime
+    llm_client.start()
+    chat_log.start()
+    try:
+        await credential_store.ensure_indexes()
+        await chat_history.ensure_indexes()
+    except Exception as e:
+        logger.warning("Could not create Mongo indexes", extra=fields(error=str(e)))
+    try:
+        # Channels don't survive a restart; re-register for the stored login
+        await channel_registry.ensure_stored_channel("demo_user")
+    except Exception as e:
+        logger.warning(
+            "Could not register calendar watch channel", extra=fields(error=str(e))
+        )
+    yield
+    # Write out any chat logs still queued before the process exits
+    await chat_log.stop()
+    # Close pooled Google Calendar and OpenRouter connections on shutdown
+    await close_http_client()
+    await llm_client.aclose()
+    app_logging.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -21,6 +62,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# One trace per /chat request, under the request's correlation id
+app.add_middleware(TracingMiddleware)
+# Outermost, so every log line a request produces carries its correlation id
+app.add_middleware(RequestContextMiddleware)
 # Include routers
 app.include_router(auth_router)
 app.include_router(chat_router)
@@ -48,15 +93,24 @@ def serve_or_authenticate(request: Request):
 # 🔁 Store a chat message
 @app.post("/log")
 async def log_message(msg: ChatMessage):
-    result = await chat_collection.insert_one(msg.dict())
-    return {"inserted_id": str(result.inserted_id)}
+    inserted_id = await chat_log.write(msg.dict())
+    if inserted_id is None:
+        return {"error": "Chat log is busy, message was not stored."}
+    return {"inserted_id": str(inserted_id)}
 
 
-# 🔁 Retrieve messages by session
+# 🔁 Retrieve messages by session, one page at a time (pass back `before` for older)
 @app.get("/messages/")
-async def get_messages(session_id: str):
-    messages = await chat_collection.find({"session_id": session_id}).to_list(100)
-    return messages
+async def get_messages(
+    session_id: str,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = chat_history.MESSAGES_PAGE_SIZE,
+):
+    try:
+        return await chat_history.fetch_page(session_id, before, after, limit)
+    except chat_history.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/chat", response_class=HTMLResponse)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing import Optional
 from datetime import datetime
 from typing import List
@@ -7,7 +7,12 @@ class ChatMessage(BaseModel):
     sender: str
     message: str
     session_id: Optional[str]
-    timestamp: Optional[datetime] = datetime.utcnow()
+    timestamp: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+    @validator("timestamp", pre=True)
+    def default_timestamp(cls, v):
+        # An explicit null would break history paging, which orders by it
+        return v or datetime.utcnow()
 
 
 class User(BaseModel):
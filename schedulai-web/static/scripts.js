@@ -4,6 +4,12 @@ const inputBox = document.getElementById("chat-input");
 const chatForm = document.getElementById("chat-form");
 const fullscreenBtn = document.getElementById("fullscreen-btn");
 
+// One id per browser tab so chat history can be paged per session
+const sessionId =
+  sessionStorage.getItem("schedulai_session") ||
+  (crypto.randomUUID ? crypto.randomUUID() : String(Date.now()));
+sessionStorage.setItem("schedulai_session", sessionId);
+
 
 
 function toggleChat() {
@@ -30,20 +36,96 @@ chatForm.onsubmit = async (e) => {
   appendMessage("You", userMessage, "user");
   inputBox.value = "";
 
-  document.getElementById("loading").style.display = "block";
+  const loading = document.getElementById("loading");
+  loading.textContent = "⏳ Working...";
+  loading.style.display = "block";
 
   try {
-    const res = await fetch("/chat", {
+    // Stream stage updates so the user sees progress before the calendar call finishes
+    const res = await fetch("/chat/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({
         message: userMessage,
+        session_id: sessionId,
       }),
     });
 
-    const data = await res.json();
-    console.log("📦 FastAPI Response:", data);
-    const botMessage =
+    await readEvents(res, (stage, data) => {
+      if (stage === "result" || stage === "error") {
+        renderResponse(data);
+      } else {
+        showStage(stage, data);
+      }
+    });
+  } catch (err) {
+    appendMessage("Schedulai", `❌ Request failed: ${err.message}`, "bot");
+  }
+
+  loading.style.display = "none";
+};
+
+async function readEvents(res, onEvent) {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let stage = "message";
+      let data = "";
+      frame.split("\n").forEach((line) => {
+        if (line.startsWith("event:")) stage = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      });
+      onEvent(stage, data ? JSON.parse(data) : null);
+    }
+  }
+}
+
+const STAGE_LABELS = {
+  parsing: "🧠 Understanding your request...",
+  checking_availability: "🔎 Checking availability...",
+  deleting: "🗑️ Deleting...",
+  updating: "✏️ Updating...",
+  created: "✅ Event created, finishing up...",
+};
+
+function showStage(stage, data) {
+  const loading = document.getElementById("loading");
+  if (stage === "action") {
+    const action = data.actions ? `${data.actions.length} requests` : data.action;
+    loading.textContent = `📋 Got it: ${action}`;
+  } else if (stage === "candidate_slot") {
+    const time = new Date(data.start).toLocaleTimeString([], {
+      hour: "2-digit",
+      minute: "2-digit",
+    });
+    loading.textContent = `🕒 Found a slot at ${time}, booking...`;
+  } else if (STAGE_LABELS[stage]) {
+    loading.textContent = STAGE_LABELS[stage];
+  }
+}
+
+function renderResponse(data) {
+  console.log("📦 FastAPI Response:", data);
+  if (data.results) {
+    // Several requests in one message: the summary, then each answer in turn
+    if (data.message) {
+      appendMessage("Schedulai", `${data.message}`, "bot");
+    }
+    data.results.forEach(renderResponse);
+    return;
+  }
+  const botMessage =
   data.message ||
   (data.event_created &&
     `✅ Event created: ${data.details.summary} on ${data.details.start.dateTime}`) ||
@@ -61,48 +143,61 @@ if (
 }
 
 
-    if (data.event_created) {
-      appendMessage(
-        "Schedulai",
-        `✅ Event created: ${data.details.summary} on ${data.details.start.dateTime}`,
-        "bot"
-      );
-    } else if (data.free_slots) {
-      appendMessage("Schedulai", `${data.message}`, "bot");
-      data.free_slots.forEach((slot) => {
-        const readable = `🕒 ${new Date(slot.start).toLocaleTimeString([], {
-          hour: "2-digit",
-          minute: "2-digit",
-        })} - ${new Date(slot.end).toLocaleTimeString([], {
-          hour: "2-digit",
-          minute: "2-digit",
-        })}`;
-        const el = document.createElement("div");
-        el.className = "slot";
-        el.textContent = readable;
-        el.onclick = () => {
-          inputBox.value = `Schedule meeting at ${readable} on ${
-            slot.start.split("T")[0]
-          }`;
-          inputBox.focus();
-        };
-        chatLog.appendChild(el);
-      });
-    } else if (data.message) {
-      appendMessage("Schedulai", data.message, "bot");
-    } else if (data.error) {
-      appendMessage("Schedulai", `❌ Error: ${data.error}`, "bot");
-    } else {
-      appendMessage("Schedulai", `⚠️ Unexpected response`, "bot");
-    }
+  if (data.event_created) {
+    appendMessage(
+      "Schedulai",
+      `✅ Event created: ${data.details.summary} on ${data.details.start.dateTime}`,
+      "bot"
+    );
+  } else if (data.free_slots_by_day) {
+    appendMessage("Schedulai", `${data.message}`, "bot");
+    Object.entries(data.free_slots_by_day).forEach(([day, slots]) => {
+      appendMessage("Schedulai", `📆 ${day}${slots.length ? "" : " — no free slots"}`, "bot");
+      slots.forEach(appendSlot);
+    });
+  } else if (data.free_slots) {
+    appendMessage("Schedulai", `${data.message}`, "bot");
+    data.free_slots.forEach(appendSlot);
+  } else if (data.message) {
+    appendMessage("Schedulai", data.message, "bot");
+  } else if (data.error) {
+    appendMessage("Schedulai", `❌ Error: ${data.error}`, "bot");
+  } else {
+    appendMessage("Schedulai", `⚠️ Unexpected response`, "bot");
+  }
 
-    chatLog.scrollTop = chatLog.scrollHeight;
-  } catch (err) {
-    appendMessage("Schedulai", `❌ Request failed: ${err.message}`, "bot");
+  if (data.blocked_slots && data.blocked_slots.length) {
+    data.blocked_slots.forEach((slot) => {
+      const time = new Date(slot.start).toLocaleTimeString([], {
+        hour: "2-digit",
+        minute: "2-digit",
+      });
+      appendMessage("Schedulai", `⛔ ${time} blocked by ${slot.blocked_by.join(", ")}`, "bot");
+    });
   }
 
-  document.getElementById("loading").style.display = "none";
-};
+  chatLog.scrollTop = chatLog.scrollHeight;
+}
+
+function appendSlot(slot) {
+  const readable = `🕒 ${new Date(slot.start).toLocaleTimeString([], {
+    hour: "2-digit",
+    minute: "2-digit",
+  })} - ${new Date(slot.end).toLocaleTimeString([], {
+    hour: "2-digit",
+    minute: "2-digit",
+  })}`;
+  const el = document.createElement("div");
+  el.className = "slot";
+  el.textContent = readable;
+  el.onclick = () => {
+    inputBox.value = `Schedule meeting at ${readable} on ${
+      slot.start.split("T")[0]
+    }`;
+    inputBox.focus();
+  };
+  chatLog.appendChild(el);
+}
 
 function appendMessage(sender, text, cssClass) {
   const msg = document.createElement("div");
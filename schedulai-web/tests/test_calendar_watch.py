@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import types
+from collections import defaultdict
+
+# app.mongo_client connects to the configured database at import; nothing
+# here touches Mongo, so hand the credential store an unused collection
+sys.modules.setdefault(
+    "app.mongo_client",
+    types.SimpleNamespace(async_client=defaultdict(lambda: defaultdict(dict))),
+)
+
+import pytest
+
+from app import calendar_watch
+from app.calendar_watch import ChannelRegistry
+from app.event_store import event_store
+
+CREDENTIALS = {"token": "t", "refresh_token": "r", "client_id": "c"}
+
+
+class FakeCalendarClient:
+    def __init__(self):
+        self.watched = []
+
+    async def watch_events(self, body):
+        self.watched.append(body)
+        return {"id": body["id"], "resourceId": "resource-1"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeCalendarClient()
+    monkeypatch.setattr(calendar_watch, "CALENDAR_WEBHOOK_URL", "https://app/hook")
+    monkeypatch.setattr(calendar_watch, "calendar_client", lambda credentials: fake)
+    return fake
+
+
+def notify(registry, channel, state="exists", token=None):
+    return registry.handle_notification(
+        channel.id,
+        channel.token if token is None else token,
+        channel.resource_id,
+        state,
+    )
+
+
+def test_notification_marks_the_users_events_stale(client):
+    registry = ChannelRegistry()
+    channel = asyncio.run(registry.ensure_channel("demo_user", CREDENTIALS))
+    store = event_store._store(CREDENTIALS)
+    store.stale = False
+
+    # The "sync" handshake sent when the channel starts changes nothing
+    assert notify(registry, channel, state="sync") == "ok"
+    assert not store.stale
+
+    assert notify(registry, channel) == "ok"
+    assert store.stale
+    assert registry.invalidations == 1
+
+
+def test_notification_with_a_wrong_token_is_ignored(client):
+    registry = ChannelRegistry()
+    channel = asyncio.run(registry.ensure_channel("demo_user", CREDENTIALS))
+    store = event_store._store(CREDENTIALS)
+    store.stale = False
+
+    assert notify(registry, channel, token="guess") == "forbidden"
+    assert not store.stale
+
+
+def test_stored_credentials_register_a_channel(client, monkeypatch):
+    async def get(user_id):
+        return CREDENTIALS if user_id == "demo_user" else None
+
+    monkeypatch.setattr(calendar_watch.credential_store, "get", get)
+    registry = ChannelRegistry()
+
+    assert asyncio.run(registry.ensure_stored_channel("nobody")) is None
+    channel = asyncio.run(registry.ensure_stored_channel("demo_user"))
+    assert client.watched[0]["address"] == "https://app/hook"
+    assert registry.push_active(channel.user_key)
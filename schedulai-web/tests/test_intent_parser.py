@@ -0,0 +1,171 @@
+import pytest
+
+from app.intent_parser import RULES, parse_intent
+
+DAY = "2030-07-19"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        f"delete all meetings on {DAY}",
+        f"Delete all meetings on {DAY}.",
+        f"remove all events for {DAY}",
+        f"clear all of my events on {DAY}",
+        f"cancel all the calls on {DAY}",
+        f"cancel every meeting on {DAY}",
+        f"clear my calendar on {DAY}",
+        f"clear the schedule for {DAY}",
+        f"clear calendar on {DAY}",
+    ],
+)
+def test_delete_all_matches(message):
+    assert parse_intent(message) == {"action": "delete_all", "date": DAY}
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # One event: must reach the LLM, never the whole-day batch delete
+        f"cancel my meeting on {DAY}",
+        f"remove event on {DAY}",
+        f"delete the call on {DAY}",
+        f"cancel meeting for {DAY}",
+        # Plural without "all" is still ambiguous
+        f"delete my meetings on {DAY}",
+        # Mismatched quantifier and noun
+        f"cancel all meeting on {DAY}",
+        f"delete every meetings on {DAY}",
+        # Extra words anywhere mean the message isn't fully understood
+        f"delete all meetings on {DAY} except the standup",
+        f"delete all meetings on {DAY} and book a call on 2030-07-20 at 9am",
+        "delete all meetings tomorrow",
+    ],
+)
+def test_delete_all_rejects(message):
+    action = parse_intent(message)
+    assert action is None or action["action"] != "delete_all"
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        (
+            "free slots on 2030-07-20 from 10 to 16 for 30 minutes",
+            {
+                "action": "check",
+                "date": "2030-07-20",
+                "start_range": "10:00",
+                "end_range": "16:00",
+                "duration": 30,
+            },
+        ),
+        (
+            "show me availability on 2030-07-20 for 2 hours",
+            {"action": "check", "date": "2030-07-20", "duration": 120},
+        ),
+        (
+            "free slots from 2030-07-20 to 2030-07-26",
+            {"action": "check", "start_date": "2030-07-20", "end_date": "2030-07-26"},
+        ),
+        (
+            "schedule a meeting 'Design Review' with a@x.com and b@y.org "
+            "on 2030-07-20 from 3pm to 4pm",
+            {
+                "action": "create",
+                "date": "2030-07-20",
+                "start_range": "15:00",
+                "end_range": "16:00",
+                "participants": ["a@x.com", "b@y.org"],
+                "title": "Design Review",
+            },
+        ),
+        (
+            "book a call on 2030-07-20 at 9am",
+            {
+                "action": "create",
+                "date": "2030-07-20",
+                "start_range": "09:00",
+                "end_range": "10:00",
+                "participants": [],
+            },
+        ),
+        (
+            "delete the meeting 'Strategy Call' on 2030-07-15 at 7pm",
+            {
+                "action": "delete",
+                "start_time": "2030-07-15T19:00:00+04:00",
+                "title": "Strategy Call",
+            },
+        ),
+        (
+            "move the 3pm meeting on 2030-07-16 to 2030-07-18 at 6pm",
+            {
+                "action": "update",
+                "original_event": {"start_time": "2030-07-16T15:00:00+04:00"},
+                "updated_fields": {
+                    "start_time": "2030-07-18T18:00:00+04:00",
+                    "end_time": "2030-07-18T19:00:00+04:00",
+                },
+            },
+        ),
+        (
+            "rename the 3pm meeting on 2030-07-20 to 'Client Review'",
+            {
+                "action": "update",
+                "original_event": {"start_time": "2030-07-20T15:00:00+04:00"},
+                "updated_fields": {"title": "Client Review"},
+            },
+        ),
+    ],
+)
+def test_rules_build_llm_shaped_actions(message, expected):
+    assert parse_intent(message) == expected
+
+
+@pytest.mark.parametrize(
+    "emails, expected",
+    [
+        ("sandra@example.com", ["sandra@example.com"]),
+        ("andrew@x.com and brandon@y.com", ["andrew@x.com", "brandon@y.com"]),
+        (
+            "a@x.com, andy@y.com, and rand@z.org",
+            ["a@x.com", "andy@y.com", "rand@z.org"],
+        ),
+        ("a@x.com,b@y.com and c@z.com", ["a@x.com", "b@y.com", "c@z.com"]),
+    ],
+)
+def test_create_keeps_addresses_whole(emails, expected):
+    action = parse_intent(f"book a call with {emails} on 2030-07-20 at 9am")
+    assert action["participants"] == expected
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "",
+        "what should I do tomorrow",
+        # End before start, or not a clock time
+        "book a call on 2030-07-20 from 4pm to 3pm",
+        "book a call on 2030-07-20 at 25pm",
+        "free slots on 2030-07-20 from 16 to 10",
+        # Relative dates are resolved before parsing; raw ones go to the LLM
+        "book a call tomorrow at 9am",
+        "move the 3pm meeting on 2030-07-16 to sometime later",
+    ],
+)
+def test_unparsed_messages_go_to_the_llm(message):
+    assert parse_intent(message) is None
+
+
+def test_every_rule_is_covered():
+    # A new rule should come with cases above
+    assert [rule for rule, _ in RULES] == [
+        "delete_all",
+        "check",
+        "check_range",
+        "create",
+        "delete",
+        "move",
+        "rename",
+    ]
@@ -0,0 +1,97 @@
+"""
+Local stand-in for Google Calendar push notifications.
+
+POSTs the same headers Google sends to a watch channel's address, so the
+/calendar/notifications -> cache invalidation path can be exercised
+offline:
+
+    # fake Calendar, and the app pointed at it with push enabled
+    python loadtest/fake_calendar.py --port 8101
+    GOOGLE_CALENDAR_API_BASE=http://127.0.0.1:8101/calendar/v3 \
+    CALENDAR_WEBHOOK_URL=http://localhost:8000/calendar/notifications \
+        uvicorn main:app
+
+    # the app registers a channel at startup from stored credentials
+    # (loadtest/run.py --seed-credentials saves some) or at login; push to
+    # the newest channel the fake Calendar holds
+    python tools/fake_calendar_push.py --fake-calendar http://127.0.0.1:8101
+
+The channel id, resource id and token are read from the fake Calendar's
+/_channels route. Against anything else, pass --channel-id, --resource-id
+and --token explicitly.
+"""
+
+import argparse
+import itertools
+
+import httpx
+
+_message_numbers = itertools.count(1)
+
+
+def push_headers(channel_id, resource_id, token, state="exists", expiration=None):
+    headers = {
+        "X-Goog-Channel-ID": channel_id,
+        "X-Goog-Channel-Token": token,
+        "X-Goog-Resource-ID": resource_id,
+        "X-Goog-Resource-URI": "https://www.googleapis.com/calendar/v3/calendars/primary/events",
+        "X-Goog-Resource-State": state,
+        "X-Goog-Message-Number": str(next(_message_numbers)),
+    }
+    if expiration:
+        headers["X-Goog-Channel-Expiration"] = expiration
+    return headers
+
+
+def send_push(url, channel_id, resource_id, token, state="exists"):
+    res = httpx.post(url, headers=push_headers(channel_id, resource_id, token, state))
+    return res.status_code, res.text
+
+
+def latest_channel(fake_calendar_url):
+    """The newest channel registered with loadtest/fake_calendar.py."""
+    res = httpx.get(f"{fake_calendar_url.rstrip('/')}/_channels")
+    res.raise_for_status()
+    channels = res.json()["channels"]
+    if not channels:
+        raise SystemExit("No watch channel registered yet (log in to the app first)")
+    return channels[-1]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--url", help="defaults to the channel's address")
+    arg_parser.add_argument(
+        "--fake-calendar", help="read the channel from this fake Calendar server"
+    )
+    arg_parser.add_argument("--channel-id")
+    arg_parser.add_argument("--resource-id")
+    arg_parser.add_argument("--token")
+    arg_parser.add_argument(
+        "--state", default="exists", choices=["sync", "exists", "not_exists"]
+    )
+    args = arg_parser.parse_args()
+
+    if args.fake_calendar:
+        channel = latest_channel(args.fake_calendar)
+        args.url = args.url or channel["address"]
+        args.channel_id = args.channel_id or channel["id"]
+        args.resource_id = args.resource_id or channel["resourceId"]
+        args.token = args.token or channel["token"]
+    elif not (args.channel_id and args.resource_id and args.token):
+        arg_parser.error(
+            "pass --fake-calendar, or --channel-id, --resource-id and --token"
+        )
+
+    status, body = send_push(
+        args.url or "http://localhost:8000/calendar/notifications",
+        args.channel_id,
+        args.resource_id,
+        args.token,
+        args.state,
+    )
+    print(status, body)
+
+
+if __name__ == "__main__":
+    main()